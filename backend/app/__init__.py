@@ -25,6 +25,10 @@ def create_app():
     from app.api.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
 
+    # WebSocket routes
+    from app.api.lidar_stream import sock
+    sock.init_app(app)
+
     @app.after_request
     def after_request(response):
         response.headers.add('Access-Control-Allow-Credentials', 'true')
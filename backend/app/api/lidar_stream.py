@@ -0,0 +1,48 @@
+# app/api/lidar_stream.py
+import json
+from flask import request
+from flask_sock import Sock
+from app.services.lidar_stream_service import lidar_stream_service
+
+sock = Sock()
+
+def parse_ack(message):
+    """Frame id of an {"ack": <frame id>} message, or None if it isn't one."""
+    try:
+        data = json.loads(message)
+        if not isinstance(data, dict):
+            return None
+        ack = data.get('ack')
+        return int(ack) if ack is not None else None
+    except (ValueError, TypeError, AttributeError, OverflowError):
+        # Malformed client messages are ignored rather than ending the stream
+        return None
+
+@sock.route('/api/robot/lidar/stream')
+def lidar_stream(ws):
+    """
+    Binary lidar voxel stream. The first message is a keyframe; after that
+    each message holds the voxels added/removed since the last frame the
+    client acknowledged by sending {"ack": <frame id>}. See
+    lib/go2_webrtc_driver/lidar/voxel_stream.py for the message layout.
+    Pass ?compress=0 to disable zlib.
+    """
+    # Imported here to avoid a circular import with app.api.routes
+    from app.api.routes import robot_service
+
+    robot_service.start_lidar()
+    client = lidar_stream_service.open_client(request.args.get('compress', '1') != '0')
+    try:
+        while True:
+            message = ws.receive(timeout=0)
+            while message is not None:
+                ack = parse_ack(message)
+                if ack:
+                    client.acked_id = ack
+                message = ws.receive(timeout=0)
+
+            payload = lidar_stream_service.next_payload(client)
+            if payload is not None:
+                ws.send(payload)
+    finally:
+        lidar_stream_service.close_client(client)
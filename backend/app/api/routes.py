@@ -1,8 +1,10 @@
 # app/api/routes.py
-from flask import Blueprint, jsonify, request, make_response
+from flask import Blueprint, Response, jsonify, request, make_response
 from flask_cors import cross_origin
 from app.infrastructure.repositories.robot_repository import RobotRepository
 from app.usecases.robot_service import RobotService
+from app.services.lidar_stream_service import lidar_stream_service
+from lib.go2_webrtc_driver.lidar.point_cloud_export import EXPORTERS
 
 api_bp = Blueprint('api', __name__)
 robot_repository = RobotRepository()
@@ -14,7 +16,11 @@ cors_config = {
     "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     "allow_headers": ["Content-Type", "Authorization"],
     "supports_credentials": True,
-    "expose_headers": ["Content-Range", "X-Content-Range"]
+    # The X-Grid-* headers describe the binary height map body
+    "expose_headers": [
+        "Content-Range", "X-Content-Range",
+        "X-Grid-Width", "X-Grid-Height", "X-Grid-Resolution", "X-Grid-Origin", "X-Grid-Frames",
+    ]
 }
 
 @api_bp.route('/robot/connect', methods=['POST', 'OPTIONS'])
@@ -79,6 +85,40 @@ def send_command():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/robot/command/stats', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def get_command_stats():
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        return jsonify(robot_service.get_command_stats()), 200
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/robot/subscriptions/stats', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def get_subscription_stats():
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        return jsonify(robot_service.get_subscription_stats()), 200
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/robot/status', methods=['GET', 'OPTIONS'])
 @cross_origin(**cors_config)
 def get_status():
@@ -128,6 +168,146 @@ def get_video():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/robot/lidar/heightmap', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def get_height_map():
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        header, grid = robot_service.get_height_map()
+        # Grid layout: int16 max height (mm), int16 min height (mm), uint8 traversability
+        response = make_response(grid)
+        response.headers['Content-Type'] = 'application/octet-stream'
+        response.headers['X-Grid-Width'] = str(header['width'])
+        response.headers['X-Grid-Height'] = str(header['height'])
+        response.headers['X-Grid-Resolution'] = str(header['resolution'])
+        response.headers['X-Grid-Origin'] = f"{header['origin'][0]},{header['origin'][1]}"
+        response.headers['X-Grid-Frames'] = str(header['frames'])
+        return response, 200
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/robot/lidar/stream/stats', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def get_lidar_stream_stats():
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    return jsonify(lidar_stream_service.stats()), 200
+
+@api_bp.route('/robot/lidar/export', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def export_point_cloud():
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    file_format = request.args.get('format', 'ply')
+    source = request.args.get('source', 'current')
+    if file_format not in EXPORTERS:
+        return jsonify({'error': f'Unsupported format: {file_format}'}), 400
+    if source not in ('current', 'map'):
+        return jsonify({'error': f'Unsupported source: {source}'}), 400
+
+    try:
+        decimate = int(request.args.get('decimate', 1))
+        radius = float(request.args['radius']) if 'radius' in request.args else None
+        voxel_size = float(request.args['voxel']) if 'voxel' in request.args else None
+        lower = upper = None
+        if request.args.get('bbox'):
+            bbox = [float(v) for v in request.args['bbox'].split(',')]
+            if len(bbox) != 6:
+                raise ValueError('bbox must be x0,y0,z0,x1,y1,z1')
+            lower, upper = bbox[:3], bbox[3:]
+        if decimate < 1:
+            raise ValueError('decimate must be at least 1')
+        if (radius is not None and radius <= 0) or (voxel_size is not None and voxel_size <= 0):
+            raise ValueError('radius and voxel must be positive')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        points = robot_service.get_point_cloud(source, radius, voxel_size)
+        # Written straight from the point array in chunks
+        body = EXPORTERS[file_format](points, lower, upper, decimate)
+        return Response(body, mimetype='application/octet-stream', headers={
+            'Content-Disposition': f'attachment; filename=lidar_{source}.{file_format}'
+        })
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/robot/map/info', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def get_map_info():
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        info = robot_service.get_map_info()
+        if info is None:
+            return jsonify({'error': 'No grid map received yet'}), 404
+        return jsonify(info), 200
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/robot/map/tiles/<int:level>/<int:tx>/<int:ty>.<fmt>', methods=['GET', 'OPTIONS'])
+@cross_origin(**cors_config)
+def get_map_tile(level, tx, ty, fmt):
+    """
+    Occupancy grid tile. Level 0 is full resolution, each level halves it;
+    ty counts up from the map origin. "png" is a north-up greyscale image,
+    "raw" the int8 cells (tile_size x tile_size, row 0 at the origin).
+    """
+    if request.method == 'OPTIONS':
+        response = make_response()
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        response.headers.add('Access-Control-Allow-Methods', 'GET')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    if fmt not in ('png', 'raw'):
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+
+    try:
+        etag = robot_service.get_map_tile_etag(level, tx, ty)
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            etag, tile = robot_service.get_map_tile(level, tx, ty, fmt)
+            response = make_response(tile)
+            response.headers['Content-Type'] = 'image/png' if fmt == 'png' else 'application/octet-stream'
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except IndexError as e:
+        return jsonify({'error': str(e)}), 404
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/robot/logs', methods=['POST', 'OPTIONS'])
 @cross_origin(**cors_config)
 def log_operation():
@@ -1,6 +1,8 @@
 from app.domain.interfaces.robot_repository import RobotRepositoryInterface
 from app.domain.entities.robot import RobotState, RobotCommand
 from app.services.robot_connection import robot_connection
+from app.services.lidar_service import lidar_service
+from app.services.grid_map_service import grid_map_service
 import cv2
 import base64
 import time
@@ -49,6 +51,18 @@ class RobotRepository(RobotRepositoryInterface):
             print(f"Error sending command: {e}")
             return False
     
+    def get_command_stats(self):
+        """Coalesced command counts, pending requests, and latency per topic and api_id"""
+        if not self.connected:
+            raise ConnectionError("Not connected to robot")
+        return robot_connection.get_command_stats()
+    
+    def get_subscription_stats(self):
+        """Message rates per topic and subscriber queue counters"""
+        if not self.connected:
+            raise ConnectionError("Not connected to robot")
+        return robot_connection.get_subscription_stats()
+    
     def get_state(self) -> RobotState:
         if not self.connected:
             raise ConnectionError("Not connected to robot")
@@ -70,22 +84,23 @@ class RobotRepository(RobotRepositoryInterface):
                 errors=0
             )
         
-        # Extract data from sensor_data
-        imu_state = sensor_data.get('imu_state', {}).get('rpy', [0, 0, 0])
-        bms_state = sensor_data.get('bms_state', {})
-        temperature_ntc1 = sensor_data.get('temperature_ntc1', 0)
-        power_v = sensor_data.get('power_v', 0)
+        # Extract data from sensor_data (flat, keyed by field path)
+        imu_state = sensor_data.get('imu_state.rpy') or [0, 0, 0]
+        battery = sensor_data.get('bms_state.soc') or 0
+        current = sensor_data.get('bms_state.current') or 0
+        temperature_ntc1 = sensor_data.get('temperature_ntc1') or 0
+        power_v = sensor_data.get('power_v') or 0
         
         # Calculate uptime since connection
         uptime = int(time.time() - self.connection_time) if self.connection_time else 0
         
         # Map the sensor data to our RobotState structure
         return RobotState(
-            battery=bms_state.get('soc', 0),
+            battery=battery,
             temperature=temperature_ntc1,
             humidity=50,  # Not directly available in sensor data, using default
             cpu_usage=30,  # Not directly available in sensor data, using default
-            power_consumption=bms_state.get('current', 0) * power_v / 1000,  # Current * Voltage = Power
+            power_consumption=current * power_v / 1000,  # Current * Voltage = Power
             speed=float(abs(imu_state[2])) / 10,  # Use yaw rotation as approximate speed indicator
             mode="Manual",  # Default mode
             uptime=uptime,  # Time since connected
@@ -110,4 +125,46 @@ class RobotRepository(RobotRepositoryInterface):
                 print(f"Error encoding video frame: {e}")
                 return None
         
-        return None
\ No newline at end of file
+        return None
+    
+    def start_lidar(self) -> bool:
+        """Start streaming lidar frames from the robot if not already running"""
+        if not self.connected:
+            raise ConnectionError("Not connected to robot")
+
+        if not lidar_service.running:
+            robot_connection.start_lidar()
+        return True
+    
+    def get_height_map(self):
+        """Get the lidar height map header and binary grid, starting lidar if needed"""
+        self.start_lidar()
+        return lidar_service.get_height_map()
+    
+    def get_point_cloud(self, source="current", radius=None, voxel_size=None):
+        """Get the latest lidar frame or accumulated map as (N, 3) points, starting lidar if needed"""
+        self.start_lidar()
+        return lidar_service.get_points(source, radius, voxel_size)
+    
+    def start_grid_map(self) -> bool:
+        """Start receiving the occupancy grid map if not already running"""
+        if not self.connected:
+            raise ConnectionError("Not connected to robot")
+
+        if not grid_map_service.running:
+            robot_connection.start_grid_map()
+        return True
+    
+    def get_map_info(self):
+        """Get the grid map geometry and tiling, or None before the first map arrives"""
+        self.start_grid_map()
+        return grid_map_service.get_info()
+    
+    def get_map_tile_etag(self, level, tx, ty):
+        self.start_grid_map()
+        return grid_map_service.get_etag(level, tx, ty)
+    
+    def get_map_tile(self, level, tx, ty, fmt):
+        """Get (etag, bytes) of a map tile as "png" or "raw" int8 cells"""
+        self.start_grid_map()
+        return grid_map_service.get_tile(level, tx, ty, fmt)
@@ -0,0 +1,73 @@
+import logging
+import threading
+import cv2
+import numpy as np
+from lib.go2_webrtc_driver.constants import RTC_TOPIC
+from lib.go2_webrtc_driver.msgs.topic_subscriber import LATEST_ONLY
+from lib.go2_webrtc_driver.mapping.grid_tiles import GridMapTiles, parse_grid_map
+
+# Occupancy (-1 unknown, 0-100) to grey: unknown mid grey, free white, occupied black
+_GREY = np.empty(256, dtype=np.uint8)
+_GREY[:] = 205
+_GREY[:101] = (255 - np.arange(101) * 255 // 100).astype(np.uint8)
+
+def render_tile(cells, fmt):
+    if fmt == 'raw':
+        return cells.tobytes()
+    # Row 0 of the grid is the map's lowest y; flip so north is up in the image
+    image = _GREY[cells.view(np.uint8)][::-1]
+    ok, buffer = cv2.imencode('.png', image)
+    if not ok:
+        raise RuntimeError("Failed to encode map tile")
+    return buffer.tobytes()
+
+class GridMapService:
+    """
+    Subscribes to the robot's occupancy grid map and serves it as cached
+    tiles. Map updates arrive on the WebRTC asyncio thread and tiles are
+    read from Flask threads, so the tiles are guarded by a lock.
+    """
+
+    def __init__(self, tile_size=256):
+        self.tiles = GridMapTiles(tile_size)
+        self.lock = threading.Lock()
+        self.running = False
+
+    async def start(self, conn):
+        if self.running:
+            return
+        # Each message is a full map, so only the newest one matters
+        conn.datachannel.pub_sub.subscribe(RTC_TOPIC["GRID_MAP"], self._on_map, policy=LATEST_ONLY)
+        self.running = True
+
+    def on_disconnect(self):
+        self.running = False
+
+    def _on_map(self, message):
+        try:
+            grid, resolution, origin = parse_grid_map(message['data'])
+            with self.lock:
+                self.tiles.update(grid, resolution, origin)
+        except Exception as e:
+            logging.error(f"Error updating grid map: {e}")
+
+    def get_info(self):
+        with self.lock:
+            return self.tiles.info()
+
+    def get_tile(self, level, tx, ty, fmt):
+        """(etag, bytes) of a tile; raises IndexError if there is no such tile"""
+        with self.lock:
+            return self.tiles.get(level, tx, ty, fmt, render_tile)
+
+    def get_etag(self, level, tx, ty):
+        with self.lock:
+            if self.tiles.grid is None or not 0 <= level < self.tiles.levels:
+                raise IndexError("No such tile level")
+            rows, cols = self.tiles.tile_counts(level)
+            if not (0 <= tx < cols and 0 <= ty < rows):
+                raise IndexError("No such tile")
+            return self.tiles.etag(level, tx, ty)
+
+# Create a singleton instance
+grid_map_service = GridMapService()
@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import numpy as np
+from lib.go2_webrtc_driver.constants import RTC_TOPIC
+from lib.go2_webrtc_driver.msgs.topic_subscriber import DROP_OLDEST
+from lib.go2_webrtc_driver.lidar.voxel_map import VoxelMap
+from lib.go2_webrtc_driver.lidar.height_map import HeightMap
+from lib.go2_webrtc_driver.lidar.frame_processor import LidarFrameProcessor
+
+# Worker processes decoding lidar frames off the WebRTC loop; 0 decodes inline
+DECODE_WORKERS = int(os.environ.get("GO2_LIDAR_DECODE_WORKERS", "0"))
+
+class LidarService:
+    """
+    Subscribes to the compressed lidar voxel topic and keeps the accumulated
+    world map and the rolling height map around the robot. Frames arrive on the WebRTC asyncio thread while the API
+    reads from Flask threads, so the map is guarded by a lock.
+    """
+
+    def __init__(self, max_voxels=500000, max_distance=30.0, decode_workers=DECODE_WORKERS):
+        self.voxel_map = VoxelMap(max_voxels=max_voxels, max_distance=max_distance)
+        self.height_map = HeightMap()
+        self.frame_processor = LidarFrameProcessor()
+        self.decode_workers = decode_workers
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.latest_message = None
+        self.subscription = None
+        self.running = False
+
+    def add_listener(self, callback):
+        """Call `callback(message)` for every lidar frame after it is merged."""
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    async def start(self, conn):
+        """Turn the robot's lidar on and subscribe to its voxel map"""
+        if self.running:
+            return
+        await conn.datachannel.disableTrafficSaving(True)
+        conn.datachannel.pub_sub.publish_without_callback(RTC_TOPIC["ULIDAR_SWITCH"], "on")
+        if self.decode_workers:
+            conn.datachannel.enable_lidar_decode_executor(workers=self.decode_workers)
+        # A short queue: if merging falls behind, stale frames are dropped
+        self.subscription = conn.datachannel.pub_sub.subscribe(
+            RTC_TOPIC["ULIDAR_ARRAY"], self._on_frame, max_queue=2, policy=DROP_OLDEST
+        )
+        self.running = True
+
+    def stop(self, conn):
+        if not self.running:
+            return
+        conn.datachannel.pub_sub.unsubscribe(RTC_TOPIC["ULIDAR_ARRAY"], self.subscription)
+        self.subscription = None
+        conn.datachannel.pub_sub.publish_without_callback(RTC_TOPIC["ULIDAR_SWITCH"], "off")
+        if self.decode_workers:
+            conn.datachannel.disable_lidar_decode_executor()
+        self.running = False
+
+    def on_disconnect(self):
+        """The connection is gone; forget the subscription and the map."""
+        self.running = False
+        self.subscription = None
+        self.reset()
+
+    def _on_frame(self, message):
+        try:
+            with self.lock:
+                self.voxel_map.integrate_message(message)
+                self.height_map.integrate_message(message)
+                self.latest_message = message
+        except Exception as e:
+            logging.error(f"Error merging lidar frame: {e}")
+            return
+
+        for listener in list(self.listeners):
+            try:
+                listener(message)
+            except Exception as e:
+                logging.error(f"Error in lidar listener: {e}")
+
+    def get_latest_frame(self):
+        with self.lock:
+            return self.latest_message
+
+    def snapshot(self):
+        with self.lock:
+            return self.voxel_map.snapshot()
+
+    def query_bbox(self, lower, upper):
+        with self.lock:
+            return self.voxel_map.query_bbox(lower, upper)
+
+    def get_points(self, source="current", radius=None, voxel_size=None):
+        """
+        (N, 3) float32 world points: the vertices of the latest frame for
+        "current", or the accumulated voxel map cell centers for "map".
+        The current frame can be cropped to `radius` around its center and
+        downsampled to one point per `voxel_size` cell.
+        """
+        with self.lock:
+            if source == "map":
+                points = self.voxel_map.cell_centers()
+                if radius is not None:
+                    points = self.frame_processor.crop_radius(points, self.voxel_map.center, radius)
+                if voxel_size is not None:
+                    points = self.frame_processor.downsample(points, voxel_size)
+                return points.copy() if radius is not None or voxel_size is not None else points
+            if self.latest_message is None:
+                return np.empty((0, 3), dtype=np.float32)
+            data = self.latest_message["data"]
+            points = self.frame_processor.process(
+                data["data"], data["origin"], data["resolution"], radius=radius, voxel_size=voxel_size
+            )
+            # The processor reuses its buffers, so hand out a copy
+            return points.copy()
+
+    def get_height_map(self):
+        """Height map header and its compact binary grid"""
+        with self.lock:
+            return self.height_map.header(), self.height_map.to_bytes()
+
+    def reset(self):
+        with self.lock:
+            self.voxel_map.clear()
+            self.height_map.clear()
+            self.latest_message = None
+
+# Create a singleton instance
+lidar_service = LidarService()
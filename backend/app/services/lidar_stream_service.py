@@ -0,0 +1,55 @@
+import threading
+from lib.go2_webrtc_driver.lidar.voxel_stream import VoxelDeltaEncoder
+from app.services.lidar_service import lidar_service
+
+class StreamClient:
+    def __init__(self, compress):
+        self.compress = compress
+        self.acked_id = None
+        self.sent_id = None
+
+class LidarStreamService:
+    """
+    Feeds lidar frames into a VoxelDeltaEncoder and hands each connected
+    viewer the delta from the last frame it acknowledged. Frames arrive on
+    the WebRTC asyncio thread, viewers wait on their own WebSocket threads.
+    """
+
+    def __init__(self, history=30):
+        self.encoder = VoxelDeltaEncoder(history)
+        self.condition = threading.Condition()
+        self.clients = 0
+
+    def on_frame(self, message):
+        data = message['data']
+        if not self.clients:
+            return
+        with self.condition:
+            self.encoder.add_frame(data['data'], data['origin'], data['resolution'])
+            self.condition.notify_all()
+
+    def open_client(self, compress=True):
+        with self.condition:
+            self.clients += 1
+        return StreamClient(compress)
+
+    def close_client(self, client):
+        with self.condition:
+            self.clients -= 1
+
+    def next_payload(self, client, timeout=1.0):
+        """Wait for a frame the client hasn't been sent and encode it, or return None"""
+        with self.condition:
+            has_new = lambda: self.encoder.latest_id is not None and self.encoder.latest_id != client.sent_id
+            if not self.condition.wait_for(has_new, timeout):
+                return None
+            client.sent_id = self.encoder.latest_id
+            return self.encoder.encode(client.acked_id, client.compress)
+
+    def stats(self):
+        with self.condition:
+            return dict(self.encoder.stats(), clients=self.clients)
+
+# Create a singleton instance
+lidar_stream_service = LidarStreamService()
+lidar_service.add_listener(lidar_stream_service.on_frame)
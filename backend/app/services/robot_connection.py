@@ -6,11 +6,26 @@ import time
 from queue import Queue
 from lib.go2_webrtc_driver.webrtc_driver import Go2WebRTCConnection, WebRTCConnectionMethod
 from lib.go2_webrtc_driver.constants import RTC_TOPIC, SPORT_CMD
+from lib.go2_webrtc_driver.msgs.topic_subscriber import LATEST_ONLY
+from app.services.lidar_service import lidar_service
+from app.services.grid_map_service import grid_map_service
 from aiortc import MediaStreamTrack
 
 # Configure logging
 logging.basicConfig(level=logging.FATAL)
 
+# Robot state is read by the dashboard's status polling; more updates are wasted work
+LOW_STATE_MAX_HZ = 10
+
+# The lowstate fields RobotRepository.get_state reads; only these are kept
+LOW_STATE_FIELDS = (
+    'imu_state.rpy',
+    'bms_state.soc',
+    'bms_state.current',
+    'temperature_ntc1',
+    'power_v',
+)
+
 class RobotConnection:
     def __init__(self):
         self.conn = None
@@ -56,6 +71,9 @@ class RobotConnection:
             self.conn = Go2WebRTCConnection(WebRTCConnectionMethod.LocalSTA, ip=ip_address)
             loop.run_until_complete(self.conn.connect())
             
+            # Held direction keys send Move faster than the robot uses it; send only the newest
+            self.conn.datachannel.pub_sub.enable_coalescing(RTC_TOPIC["SPORT_MOD"], [SPORT_CMD["Move"]])
+
             # Switch video channel on and start receiving video frames
             self.conn.video.switchVideoChannel(True)
             
@@ -63,14 +81,19 @@ class RobotConnection:
             self.conn.video.add_track_callback(self._handle_video_frame)
             
             # Define a callback function to handle lowstate status when received
-            def lowstate_callback(message):
-                current_message = message['data']
-                self.sensor_data_latest = current_message
+            def lowstate_callback(record):
+                self.sensor_data_latest = record
                 # Log the data for debugging
-                # print(f"Received sensor data: {current_message}")
+                # print(f"Received sensor data: {record}")
             
             # Subscribe to the LOW_STATE data channel to receive sensor updates
-            self.conn.datachannel.pub_sub.subscribe(RTC_TOPIC['LOW_STATE'], lowstate_callback)
+            # Only the latest state is kept, so a backlog is never processed, and
+            # the dashboard polls far slower than the robot publishes. Messages
+            # are reduced to LOW_STATE_FIELDS rather than keeping the motor arrays.
+            self.conn.datachannel.pub_sub.subscribe(
+                RTC_TOPIC['LOW_STATE'], lowstate_callback, policy=LATEST_ONLY,
+                max_hz=LOW_STATE_MAX_HZ, fields=LOW_STATE_FIELDS
+            )
             
             # Set connected status
             self.connected = True
@@ -114,12 +137,65 @@ class RobotConnection:
         return None
             
     def get_latest_sensor_data(self):
-        """Get the latest sensor data"""
+        """Get the latest sensor data: LOW_STATE_FIELDS by path, None where missing"""
         if not self.connected:
             return None
             
         return self.sensor_data_latest
             
+    def get_command_stats(self):
+        """Command coalescing counters, pending request gauges, request latency and send queues"""
+        if not self.connected or not self.conn:
+            raise ConnectionError("Not connected to robot")
+        pub_sub = self.conn.datachannel.pub_sub
+        return {
+            'coalesced': pub_sub.coalescing_stats(),
+            'pending': pub_sub.future_resolver.stats(),
+            'requests': pub_sub.request_stats(),
+            'read_cache': pub_sub.read_cache_stats(),
+            'scheduler': pub_sub.scheduler_stats(),
+        }
+
+    def get_subscription_stats(self):
+        """Arrived and delivered message rates per topic, and per-subscriber queues"""
+        if not self.connected or not self.conn:
+            raise ConnectionError("Not connected to robot")
+        pub_sub = self.conn.datachannel.pub_sub
+        return {
+            'topics': pub_sub.rate_stats(),
+            'subscribers': pub_sub.subscription_stats(),
+        }
+
+    def start_lidar(self):
+        """Start streaming lidar frames into the lidar service"""
+        if not self.connected or not self.conn:
+            raise ConnectionError("Not connected to robot")
+
+        future = asyncio.run_coroutine_threadsafe(
+            lidar_service.start(self.conn),
+            self.asyncio_loop
+        )
+        try:
+            future.result(timeout=5)
+        except Exception as e:
+            raise RuntimeError(f"Error starting lidar: {e}")
+        return True
+
+    def start_grid_map(self):
+        """Start receiving the occupancy grid map into the grid map service"""
+        if not self.connected or not self.conn:
+            raise ConnectionError("Not connected to robot")
+
+        future = asyncio.run_coroutine_threadsafe(
+            grid_map_service.start(self.conn),
+            self.asyncio_loop
+        )
+        try:
+            future.result(timeout=5)
+        except Exception as e:
+            raise RuntimeError(f"Error starting grid map: {e}")
+        return True
+
     def send_command(self, command):
         """Send a command to the robot"""
         if not self.connected or not self.conn:
@@ -163,6 +239,9 @@ class RobotConnection:
     def disconnect(self):
         """Disconnect from the robot"""
         if self.connected and self.conn:
+            lidar_service.on_disconnect()
+            grid_map_service.on_disconnect()
+
             if self.asyncio_loop:
                 try:
                     asyncio.run_coroutine_threadsafe(
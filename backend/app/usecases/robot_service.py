@@ -15,9 +15,36 @@ class RobotService:
         cmd = RobotCommand(command=command, parameters=parameters)
         return self.repository.send_command(cmd)
     
+    def get_command_stats(self):
+        return self.repository.get_command_stats()
+    
+    def get_subscription_stats(self):
+        return self.repository.get_subscription_stats()
+    
     def get_state(self) -> RobotState:
         return self.repository.get_state()
     
     def get_video_frame(self) -> str:
         """Get the latest video frame as a base64-encoded JPEG image"""
-        return self.repository.get_video_frame()
\ No newline at end of file
+        return self.repository.get_video_frame()
+    
+    def start_lidar(self) -> bool:
+        return self.repository.start_lidar()
+    
+    def get_height_map(self):
+        """Get the lidar height map as (header dict, binary grid)"""
+        return self.repository.get_height_map()
+    
+    def get_point_cloud(self, source: str = "current", radius: float = None, voxel_size: float = None):
+        """Get the current lidar frame ("current") or accumulated map ("map") as (N, 3) points"""
+        return self.repository.get_point_cloud(source, radius, voxel_size)
+    
+    def get_map_info(self):
+        return self.repository.get_map_info()
+    
+    def get_map_tile_etag(self, level: int, tx: int, ty: int) -> str:
+        return self.repository.get_map_tile_etag(level, tx, ty)
+    
+    def get_map_tile(self, level: int, tx: int, ty: int, fmt: str):
+        """Get (etag, bytes) of a grid map tile"""
+        return self.repository.get_map_tile(level, tx, ty, fmt)
@@ -0,0 +1,113 @@
+"""
+Bytes allocated (and so copies made) per large message on the binary
+data channel path, before and after zero-copy framing and preallocated
+chunk reassembly.
+
+Framing: splitting a binary lidar message into its JSON header and voxel
+payload, with the previous bytes slicing and with split_array_buffer.
+Reassembly: a chunked response put back together by the previous
+list + merge_array_buffers code and by FutureResolver, in order and
+shuffled. Peak allocation is measured with tracemalloc and shown as a
+multiple of the message size, which is the number of copies alive at once.
+
+Usage: python benchmarks/bench_binary_framing.py [--size MiB] [--chunk KiB]
+"""
+import argparse
+import json
+import random
+import struct
+import time
+import tracemalloc
+
+import lidar_payloads  # noqa: F401  (sets up sys.path)
+from lidar_payloads import DEFAULT_META, lidar_message
+from lib.go2_webrtc_driver.msgs.future_resolver import FutureResolver
+from lib.go2_webrtc_driver.webrtc_datachannel import WebRTCDataChannel
+
+
+def legacy_split(buffer):
+    """The framing used before: every slice of `buffer` is a copy."""
+    header_1, header_2 = struct.unpack_from('<HH', buffer, 0)
+    if header_1 == 2 and header_2 == 0:
+        buffer = buffer[4:]
+        header_length, = struct.unpack_from('<I', buffer, 0)
+        json_data, binary_data = buffer[8:8 + header_length], buffer[8 + header_length:]
+    else:
+        header_length, = struct.unpack_from('<H', buffer, 0)
+        json_data, binary_data = buffer[4:4 + header_length], buffer[4 + header_length:]
+    return json.loads(json_data.decode('utf-8')), binary_data
+
+
+def legacy_reassemble(chunks):
+    """The reassembly used before: chunks listed in arrival order, then merged twice."""
+    storage = []
+    for _, chunk in chunks:
+        storage.append(chunk)
+    merged = bytearray(sum(len(chunk) for chunk in storage))
+    position = 0
+    for chunk in storage:
+        merged[position:position + len(chunk)] = chunk
+        position += len(chunk)
+    return bytes(merged)
+
+
+def resolver_reassemble(chunks):
+    resolver = FutureResolver()
+    result = {}
+    total = len(chunks)
+    for index, chunk in chunks:
+        message = {
+            "type": "res",
+            "topic": "bench",
+            "data": {"uuid": "bench", "content_info": {"enable_chunking": True, "chunk_index": index,
+                                                       "total_chunk_num": total}, "data": chunk},
+        }
+        resolver.run_resolve_for_topic(message)
+        result = message["data"]["data"]
+    return result
+
+
+def measure(fn, size, repeat=5):
+    fn()  # Warm up
+    times = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+        del result
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times) * 1e3, peak, peak / size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=float, default=8, help="message size in MiB")
+    parser.add_argument("--chunk", type=int, default=60, help="chunk size in KiB")
+    args = parser.parse_args()
+
+    size = int(args.size * 1024 * 1024)
+    payload = random.Random(0).randbytes(size)
+    message = lidar_message(payload, DEFAULT_META)
+
+    print(f"{'step':>24} {'path':>22} {'ms':>8} {'peak alloc':>12} {'x size':>7}")
+    for name, fn in (("previous", lambda: legacy_split(message)),
+                     ("memoryview", lambda: WebRTCDataChannel.split_array_buffer(message))):
+        ms, peak, ratio = measure(fn, size)
+        print(f"{'framing':>24} {name:>22} {ms:>8.2f} {peak:>12} {ratio:>7.2f}")
+
+    step = args.chunk * 1024
+    ordered = [(i // step + 1, payload[i:i + step]) for i in range(0, size, step)]
+    shuffled = ordered[:]
+    random.Random(1).shuffle(shuffled)
+    assert resolver_reassemble(shuffled) == payload
+    for name, fn in (("previous", lambda: legacy_reassemble(ordered)),
+                     ("preallocated", lambda: resolver_reassemble(ordered)),
+                     ("preallocated, shuffled", lambda: resolver_reassemble(shuffled))):
+        ms, peak, ratio = measure(fn, size)
+        print(f"{f'reassembly ({len(ordered)} chunks)':>24} {name:>22} {ms:>8.2f} {peak:>12} {ratio:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
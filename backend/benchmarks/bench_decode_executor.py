@@ -0,0 +1,91 @@
+"""
+Event-loop stall caused by lidar decoding, inline vs. LidarDecodeExecutor.
+
+A ticker coroutine measures how late each 5 ms sleep wakes up while frames
+are fed at the robot's rate; the worst lateness is what heartbeats, futures
+and video see.
+
+Usage: python benchmarks/bench_decode_executor.py [--frames N] [--hz HZ] [--workers N]
+"""
+import argparse
+import asyncio
+import time
+
+from lidar_payloads import DEFAULT_META, make_voxel_payload
+from lib.go2_webrtc_driver.lidar.lidar_decoder import LidarDecoder
+from lib.go2_webrtc_driver.lidar.decode_executor import LidarDecodeExecutor
+
+TICK = 0.005
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def feed(payload, frames, hz, handle):
+    for _ in range(frames):
+        handle({"data": dict(DEFAULT_META)}, payload)
+        await asyncio.sleep(1 / hz)
+
+
+async def run_inline(payload, frames, hz):
+    decoder = LidarDecoder()
+    lags, stop = [], asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+
+    def handle(message, data):
+        message["data"]["data"] = decoder.decode(data, message["data"])
+
+    await feed(payload, frames, hz, handle)
+    stop.set()
+    await tick_task
+    return max(lags), None
+
+
+async def run_executor(payload, frames, hz, workers):
+    delivered = asyncio.Event()
+
+    async def on_decoded(message):
+        # +1 for the warm-up frame
+        if executor.delivered == frames + 1:
+            delivered.set()
+
+    executor = LidarDecodeExecutor(on_decoded, workers=workers, max_queue=frames)
+    # Warm the workers up so process start-up isn't measured
+    executor.submit({"data": dict(DEFAULT_META)}, payload)
+    while executor.delivered < 1:
+        await asyncio.sleep(0.01)
+
+    lags, stop = [], asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await feed(payload, frames, hz, executor.submit)
+    await delivered.wait()
+    stop.set()
+    await tick_task
+    stats = executor.stats()
+    executor.shutdown()
+    return max(lags), stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--hz", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    payload = make_voxel_payload(0.05)
+    inline_lag, _ = asyncio.run(run_inline(payload, args.frames, args.hz))
+    executor_lag, stats = asyncio.run(run_executor(payload, args.frames, args.hz, args.workers))
+
+    print(f"inline    max loop lag {inline_lag * 1e3:7.2f} ms")
+    print(f"executor  max loop lag {executor_lag * 1e3:7.2f} ms  "
+          f"(avg decode {stats['avg_decode_latency'] * 1e3:.2f} ms, "
+          f"last total {stats['last_total_latency'] * 1e3:.2f} ms, dropped {stats['dropped']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-frame time and allocations of world transform + crop + downsampling.
+
+"naive" is the allocate-per-step NumPy code consumers used to write;
+"processor" is LidarFrameProcessor with its reused buffers. Allocated
+bytes are the sum of tracemalloc'd NumPy allocations during one frame.
+
+Usage: python benchmarks/bench_frame_processor.py [--frames N] [--faces N]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from lidar_payloads import DEFAULT_META
+from lib.go2_webrtc_driver.lidar.frame_processor import LidarFrameProcessor
+
+RADIUS = 2.0
+VOXEL = 0.1
+
+
+def naive(decoded, origin, resolution):
+    points = decoded["positions"].reshape(-1, 3).astype(np.float32) * resolution + np.asarray(origin, dtype=np.float32)
+    center = (points.min(axis=0) + points.max(axis=0)) / 2
+    points = points[np.linalg.norm(points - center, axis=1) <= RADIUS]
+    cells, inverse = np.unique(np.floor(points / VOXEL), axis=0, return_inverse=True)
+    sums = np.zeros((len(cells), 3), dtype=np.float64)
+    np.add.at(sums, inverse.ravel(), points)
+    return sums / np.bincount(inverse.ravel())[:, None]
+
+
+def measure(fn, decoded, frames):
+    fn(decoded, DEFAULT_META["origin"], DEFAULT_META["resolution"])
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn(decoded, DEFAULT_META["origin"], DEFAULT_META["resolution"])
+    elapsed = (time.perf_counter() - start) / frames
+
+    tracemalloc.start()
+    fn(decoded, DEFAULT_META["origin"], DEFAULT_META["resolution"])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--faces", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    decoded = {"positions": rng.integers(0, 128, args.faces * 12, dtype=np.uint8)}
+    processor = LidarFrameProcessor()
+
+    def processed(decoded, origin, resolution):
+        return processor.process(decoded, origin, resolution, radius=RADIUS, voxel_size=VOXEL)
+
+    for name, fn in (("naive", naive), ("processor", processed)):
+        elapsed, peak = measure(fn, decoded, args.frames)
+        print(f"{name:>10}  {elapsed * 1e3:7.2f} ms/frame  peak allocated {peak / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Messages/s of the data channel JSON path, before and after the codec layer.
+
+Inbound: a synthetic high-rate lowstate stream parsed and dispatched to a
+latest-only subscriber, as WebRTCDataChannel.on_message does. Outbound:
+repeated sport Move requests and video switches. "before" is the
+previous code (json.loads/json.dumps of the full message dict); the
+codec rows use the pre-serialized templates with each available backend.
+
+Usage: python benchmarks/bench_json_codec.py [--messages N]
+"""
+import argparse
+import json
+import random
+import time
+
+import lidar_payloads  # noqa: F401  (sets up sys.path)
+from lib.go2_webrtc_driver.constants import DATA_CHANNEL_TYPE, RTC_TOPIC, SPORT_CMD
+from lib.go2_webrtc_driver.msgs import codec
+from lib.go2_webrtc_driver.msgs.pub_sub import WebRTCDataChannelPubSub
+from lib.go2_webrtc_driver.msgs.topic_subscriber import LATEST_ONLY
+
+
+class NullChannel:
+    readyState = "open"
+
+    def send(self, message):
+        pass
+
+
+def make_lowstate(seed=0):
+    rng = random.Random(seed)
+    motor = lambda: {"q": rng.uniform(-3, 3), "dq": rng.uniform(-10, 10), "ddq": 0,
+                     "tau_est": rng.uniform(-5, 5), "temperature": rng.randint(25, 60), "lost": 0, "reserve": [0, 0]}
+    return json.dumps({
+        "type": DATA_CHANNEL_TYPE["MSG"],
+        "topic": RTC_TOPIC["LOW_STATE"],
+        "data": {
+            "imu_state": {"quaternion": [rng.random() for _ in range(4)], "gyroscope": [rng.random() for _ in range(3)],
+                          "accelerometer": [rng.random() for _ in range(3)], "rpy": [rng.random() for _ in range(3)],
+                          "temperature": 40},
+            "motor_state": [motor() for _ in range(20)],
+            "bms_state": {"version_high": 1, "version_low": 18, "status": 8, "soc": 87, "current": -3200,
+                          "cycle": 12, "bq_ntc": [27, 26], "mcu_ntc": [31, 30], "cell_vol": [3900 + i for i in range(15)]},
+            "foot_force": [rng.randint(0, 40) for _ in range(4)],
+            "temperature_ntc1": 46,
+            "power_v": 28.4,
+        },
+    })
+
+
+def legacy_request(topic, request_id, options):
+    """The request encoding used before the codec layer."""
+    payload = {"header": {"identity": {"id": request_id, "api_id": options["api_id"]}}, "parameter": ""}
+    if "parameter" in options:
+        payload["parameter"] = json.dumps(options["parameter"])
+    return json.dumps({"type": DATA_CHANNEL_TYPE["REQUEST"], "topic": topic, "data": payload})
+
+
+def rate(fn, messages):
+    fn(0)  # Warm up
+    start = time.perf_counter()
+    for i in range(messages):
+        fn(i)
+    return messages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    lowstate = make_lowstate()
+    move = {"api_id": SPORT_CMD["Move"], "parameter": {"x": 0.5, "y": 0, "z": 0}}
+    print(f"lowstate message: {len(lowstate)} bytes")
+
+    pub_sub = WebRTCDataChannelPubSub(NullChannel())
+    subscriber = pub_sub.subscribe(RTC_TOPIC["LOW_STATE"], policy=LATEST_ONLY)
+
+    def inbound_before(i):
+        pub_sub.run_resolve(json.loads(lowstate))
+
+    def inbound_codec(i):
+        pub_sub.run_resolve(codec.loads(lowstate))
+
+    def move_before(i):
+        pub_sub.channel.send(legacy_request(RTC_TOPIC["SPORT_MOD"], i, move))
+
+    def move_codec(i):
+        pub_sub.channel.send(pub_sub.encode_request(RTC_TOPIC["SPORT_MOD"], i, move))
+
+    def switch_before(i):
+        pub_sub.channel.send(json.dumps({"type": DATA_CHANNEL_TYPE["VID"], "topic": "", "data": "on"}))
+
+    def switch_codec(i):
+        pub_sub.publish_without_callback("", "on", DATA_CHANNEL_TYPE["VID"])
+
+    rows = [("before", "json", inbound_before, move_before, switch_before)]
+    for backend in ("json", "orjson"):
+        rows.append(("codec", backend, inbound_codec, move_codec, switch_codec))
+
+    print(f"{'path':>7} {'backend':>7} {'lowstate in/s':>14} {'move out/s':>11} {'switch out/s':>13}")
+    for path, backend, inbound, move_out, switch_out in rows:
+        try:
+            codec.set_backend(backend)
+        except ImportError:
+            print(f"{path:>7} {backend:>7} not installed")
+            continue
+        # Templates are serialized with the backend that built them
+        pub_sub.templates = codec.TemplateCache()
+        print(f"{path:>7} {backend:>7} {rate(inbound, args.messages):>14.0f} "
+              f"{rate(move_out, args.messages):>11.0f} {rate(switch_out, args.messages):>13.0f}")
+    print(f"subscriber: {subscriber.stats()['received']} received, {subscriber.stats()['dropped']} dropped")
+
+
+if __name__ == "__main__":
+    main()
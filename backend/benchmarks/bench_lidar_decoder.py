@@ -0,0 +1,65 @@
+"""
+Before/after benchmark of LidarDecoder memory I/O.
+
+"before" reproduces the original per-byte input loop and ctypes/bytearray
+output copies; "after" is the NumPy-view implementation, with and without
+reused output arrays.
+
+Usage: python benchmarks/bench_lidar_decoder.py [--frames N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from lidar_payloads import DEFAULT_META, make_voxel_payload
+from lib.go2_webrtc_driver.lidar.lidar_decoder import LidarDecoder
+
+
+class LegacyLidarDecoder(LidarDecoder):
+    """LidarDecoder with the pre-NumPy-view copy paths."""
+
+    def add_value_arr(self, start, value):
+        heap = self.HEAPU8
+        for i, byte in enumerate(value):
+            heap[start + i] = byte
+
+    @staticmethod
+    def _read_output(view, out, dtype):
+        return np.frombuffer(bytearray(view.tolist()), dtype=dtype)
+
+
+def run(decoder, payload, frames, **outputs):
+    decoder.decode(payload, DEFAULT_META, **outputs)
+    start = time.perf_counter()
+    for _ in range(frames):
+        decoder.decode(payload, DEFAULT_META, **outputs)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    legacy = LegacyLidarDecoder()
+    decoder = LidarDecoder()
+    outputs = {
+        "positions": np.empty(LidarDecoder.POSITIONS_SIZE, dtype=np.uint8),
+        "uvs": np.empty(LidarDecoder.UVS_SIZE, dtype=np.uint8),
+        "indices": np.empty(LidarDecoder.INDICES_SIZE // 4, dtype=np.uint32),
+    }
+
+    print(f"{'density':>8} {'bytes':>7} {'faces':>7} {'before ms':>10} {'after ms':>9} {'reused ms':>10} {'speedup':>8}")
+    for density in (0.005, 0.02, 0.05):
+        payload = make_voxel_payload(density)
+        faces = decoder.decode(payload, DEFAULT_META)["face_count"]
+        before = run(legacy, payload, args.frames)
+        after = run(decoder, payload, args.frames)
+        reused = run(decoder, payload, args.frames, **outputs)
+        print(f"{density:>8} {len(payload):>7} {faces:>7} {before * 1e3:>10.2f} "
+              f"{after * 1e3:>9.2f} {reused * 1e3:>10.2f} {before / reused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Replay a lidar recording through the data channel's decode path.
+
+Records are made with WebRTCDataChannel.start_lidar_recording(path), or
+synthesized with --synthesize so the benchmark runs without a robot.
+Each replayed message goes through WebRTCDataChannel.deal_array_buffer
+and its lazy data is decoded, as a subscriber reading the mesh would.
+
+Usage: python benchmarks/bench_lidar_replay.py RECORDING [--speed S] [--synthesize N]
+"""
+import argparse
+import asyncio
+import time
+
+from lidar_payloads import lidar_message, make_voxel_payload
+from lib.go2_webrtc_driver.lidar.recording import LidarRecorder, LidarRecording
+from lib.go2_webrtc_driver.webrtc_datachannel import WebRTCDataChannel
+
+
+def synthesize(path, frames, hz=7.0):
+    payloads = [make_voxel_payload(density, seed) for seed, density in enumerate((0.01, 0.02, 0.04))]
+    start = time.time()
+    with LidarRecorder(path) as recorder:
+        for i in range(frames):
+            stamp = start + i / hz
+            recorder.write(lidar_message(payloads[i % len(payloads)], stamp=stamp), timestamp=stamp)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0, help="0 replays as fast as possible")
+    parser.add_argument("--synthesize", type=int, metavar="N", help="write N synthetic frames first")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        synthesize(args.recording, args.synthesize)
+
+    def handle(buffer):
+        message = WebRTCDataChannel.deal_array_buffer(buffer)
+        message["data"]["data"]
+
+    with LidarRecording(args.recording) as recording:
+        start = time.perf_counter()
+        frames = asyncio.run(recording.replay(handle, args.speed))
+        elapsed = time.perf_counter() - start
+        print(f"{frames} frames ({recording.duration:.1f} s recorded) in {elapsed:.2f} s, "
+              f"{frames / elapsed:.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Lidar decode benchmark and golden-output check.
+
+Runs every compressed voxel payload in fixtures/lidar through
+LidarDecoder.decode and through WebRTCDataChannel.deal_array_buffer
+(with the decode cache cleared each frame, so every frame is decoded).
+Reports frames/s, p50/p99 latency and peak traced memory, and checks the
+decoded arrays against the SHA-256 hashes in fixtures/lidar/golden.json.
+Exits non-zero if any output differs.
+
+Usage:
+  python benchmarks/bench_lidar_suite.py [--frames N] [--output results.json]
+  python benchmarks/bench_lidar_suite.py --make-fixtures [--from-recording FILE]
+  python benchmarks/bench_lidar_suite.py --update-golden
+
+--make-fixtures writes synthetic payloads (fixed seeds), or picks payloads
+of increasing size from a LidarRecorder file, then updates golden.json.
+Only update the golden hashes when a change to the decoder's output is
+intended.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from lidar_payloads import DEFAULT_META, lidar_message, make_voxel_payload
+from lib.go2_webrtc_driver.lidar.lidar_decoder import LidarDecoder
+from lib.go2_webrtc_driver import webrtc_datachannel
+from lib.go2_webrtc_driver.webrtc_datachannel import WebRTCDataChannel
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "lidar")
+GOLDEN_PATH = os.path.join(FIXTURE_DIR, "golden.json")
+
+SYNTHETIC_FIXTURES = {
+    "tiny": 0.002,
+    "small": 0.01,
+    "medium": 0.03,
+    "large": 0.08,
+}
+
+
+def fixture_path(name):
+    return os.path.join(FIXTURE_DIR, f"{name}.bin")
+
+
+def load_golden():
+    with open(GOLDEN_PATH) as f:
+        return json.load(f)
+
+
+def output_hashes(decoded):
+    hashes = {
+        name: hashlib.sha256(np.ascontiguousarray(decoded[name]).tobytes()).hexdigest()
+        for name in ("positions", "uvs", "indices")
+    }
+    hashes["point_count"] = decoded["point_count"]
+    hashes["face_count"] = decoded["face_count"]
+    return hashes
+
+
+def write_golden(fixtures):
+    decoder = LidarDecoder()
+    golden = {}
+    for name, meta in fixtures.items():
+        with open(fixture_path(name), "rb") as f:
+            payload = f.read()
+        golden[name] = {"meta": meta, "bytes": len(payload), "output": output_hashes(decoder.decode(payload, meta))}
+    with open(GOLDEN_PATH, "w") as f:
+        json.dump(golden, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {GOLDEN_PATH}")
+
+
+def make_fixtures(recording_path=None):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    fixtures = {}
+    if recording_path:
+        from lib.go2_webrtc_driver.lidar.recording import LidarRecording
+
+        with LidarRecording(recording_path) as recording:
+            frames = [bytes(recording[i]) for i in range(len(recording))]
+        messages = [(WebRTCDataChannel.split_array_buffer(frame), frame) for frame in frames]
+        messages.sort(key=lambda item: len(item[0][1]))
+        picks = np.linspace(0, len(messages) - 1, len(SYNTHETIC_FIXTURES)).astype(int)
+        for name, i in zip(SYNTHETIC_FIXTURES, picks):
+            (header, payload), _ = messages[i]
+            with open(fixture_path(name), "wb") as f:
+                f.write(payload)
+            fixtures[name] = {"origin": header["data"]["origin"], "resolution": header["data"]["resolution"]}
+    else:
+        for seed, (name, density) in enumerate(SYNTHETIC_FIXTURES.items()):
+            with open(fixture_path(name), "wb") as f:
+                f.write(make_voxel_payload(density, seed))
+            fixtures[name] = dict(DEFAULT_META)
+    write_golden(fixtures)
+
+
+def measure(fn, frames):
+    fn()  # Warm up
+    samples = []
+    tracemalloc.start()
+    for _ in range(frames):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = np.array(samples)
+    return {
+        "frames_per_s": float(len(samples) / samples.sum()),
+        "p50_ms": float(np.percentile(samples, 50) * 1e3),
+        "p99_ms": float(np.percentile(samples, 99) * 1e3),
+        "peak_memory_bytes": int(peak),
+    }
+
+
+def run_suite(frames):
+    golden = load_golden()
+    decoder = LidarDecoder()
+    cache = webrtc_datachannel.get_decode_cache()
+    results = {}
+    mismatches = []
+
+    for name, entry in golden.items():
+        with open(fixture_path(name), "rb") as f:
+            payload = f.read()
+        meta = entry["meta"]
+        message = lidar_message(payload, meta)
+
+        hashes = output_hashes(decoder.decode(payload, meta))
+        via_channel = WebRTCDataChannel.deal_array_buffer(message)["data"]["data"]
+        for path, got in (("decode", hashes), ("deal_array_buffer", output_hashes(via_channel))):
+            if got != entry["output"]:
+                mismatches.append(f"{name} ({path})")
+
+        def decode_channel():
+            cache.clear()
+            WebRTCDataChannel.deal_array_buffer(message)["data"]["data"]
+
+        results[name] = {
+            "payload_bytes": len(payload),
+            "face_count": hashes["face_count"],
+            "decode": measure(lambda: decoder.decode(payload, meta), frames),
+            "deal_array_buffer": measure(decode_channel, frames),
+        }
+    return results, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--make-fixtures", action="store_true")
+    parser.add_argument("--from-recording", metavar="FILE")
+    parser.add_argument("--update-golden", action="store_true")
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures(args.from_recording)
+        return
+    if args.update_golden:
+        write_golden({name: entry["meta"] for name, entry in load_golden().items()})
+        return
+
+    results, mismatches = run_suite(args.frames)
+
+    print(f"{'fixture':>8} {'bytes':>7} {'faces':>7} {'path':>18} {'frames/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'peak KiB':>9}")
+    for name, result in results.items():
+        for path in ("decode", "deal_array_buffer"):
+            r = result[path]
+            print(f"{name:>8} {result['payload_bytes']:>7} {result['face_count']:>7} {path:>18} "
+                  f"{r['frames_per_s']:>9.1f} {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['peak_memory_bytes'] / 1024:>9.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "timestamp": time.time(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "frames": args.frames,
+                "golden_ok": not mismatches,
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+    if mismatches:
+        print(f"Golden output mismatch: {', '.join(mismatches)}")
+        sys.exit(1)
+    print("Golden outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup cost of the driver and of the lidar decoder.
+
+Each measurement runs in a fresh interpreter so import caches don't leak
+between runs. Compare the import time against the baseline commit (which
+built the decoder at import) with `git stash` / `git checkout`.
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from lidar_payloads import BACKEND_DIR
+
+IMPORT_DRIVER = """
+import time
+start = time.perf_counter()
+import lib.go2_webrtc_driver.webrtc_datachannel
+print(time.perf_counter() - start)
+"""
+
+BUILD_DECODER = """
+import time
+from lib.go2_webrtc_driver.lidar.lidar_decoder import LidarDecoder
+start = time.perf_counter()
+LidarDecoder()
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code, runs, env=None):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, text=True
+        )
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"import webrtc_datachannel      {measure(IMPORT_DRIVER, args.runs) * 1e3:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, GO2_WASM_CACHE_DIR="")
+        print(f"LidarDecoder() without cache   {measure(BUILD_DECODER, args.runs, env) * 1e3:8.1f} ms")
+        env = dict(os.environ, GO2_WASM_CACHE_DIR=cache_dir)
+        measure(BUILD_DECODER, 1, env)
+        print(f"LidarDecoder() from cache      {measure(BUILD_DECODER, args.runs, env) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
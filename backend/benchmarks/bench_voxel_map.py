@@ -0,0 +1,47 @@
+"""
+Per-frame cost of merging decoded lidar frames into the VoxelMap.
+
+Frames are synthetic decoder output (random quads in the 128^3 voxel box)
+drifting along x, so the map keeps growing and eviction is exercised.
+
+Usage: python benchmarks/bench_voxel_map.py [--frames N] [--faces N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from lidar_payloads import DEFAULT_META
+from lib.go2_webrtc_driver.lidar.voxel_map import VoxelMap
+
+
+def make_frame(rng, faces):
+    return {"positions": rng.integers(0, 128, faces * 12, dtype=np.uint8)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--faces", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [make_frame(rng, args.faces) for _ in range(10)]
+    voxel_map = VoxelMap(max_voxels=300000, max_distance=10.0)
+    resolution = DEFAULT_META["resolution"]
+
+    samples = []
+    for i in range(args.frames):
+        origin = [i * 0.05, 0.0, DEFAULT_META["origin"][2]]
+        start = time.perf_counter()
+        voxel_map.integrate(frames[i % len(frames)], origin, resolution)
+        samples.append(time.perf_counter() - start)
+
+    samples = np.array(samples) * 1e3
+    print(f"faces/frame {args.faces}  p50 {np.percentile(samples, 50):.2f} ms  "
+          f"p99 {np.percentile(samples, 99):.2f} ms  max {samples.max():.2f} ms")
+    print(voxel_map.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Bytes on the wire and encode time of the lidar voxel stream.
+
+Compares sending the decoder's full positions/uvs/indices arrays with a
+keyframe and with per-frame deltas (with and without zlib). Frames are
+synthetic decoder output where `--churn` of the quads change each frame.
+
+Usage: python benchmarks/bench_voxel_stream.py [--frames N] [--faces N] [--churn F]
+"""
+import argparse
+
+import numpy as np
+
+from lidar_payloads import DEFAULT_META
+from lib.go2_webrtc_driver.lidar.voxel_stream import VoxelDeltaEncoder
+
+
+def make_frames(frames, faces, churn, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, 128, (faces, 12), dtype=np.uint8)
+    for _ in range(frames):
+        changed = rng.random(faces) < churn
+        positions[changed] = rng.integers(0, 128, (np.count_nonzero(changed), 12), dtype=np.uint8)
+        yield {
+            "positions": positions.ravel().copy(),
+            "uvs": np.zeros(faces * 8, dtype=np.uint8),
+            "indices": np.zeros(faces * 6, dtype=np.uint32),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--faces", type=int, default=20000)
+    parser.add_argument("--churn", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for compress in (False, True):
+        encoder = VoxelDeltaEncoder()
+        raw, keyframe, deltas = 0, [], []
+        acked = None
+        for decoded in make_frames(args.frames, args.faces, args.churn):
+            raw = decoded["positions"].nbytes + decoded["uvs"].nbytes + decoded["indices"].nbytes
+            encoder.add_frame(decoded, DEFAULT_META["origin"], DEFAULT_META["resolution"])
+            payload = encoder.encode(acked, compress)
+            (deltas if acked else keyframe).append((len(payload), encoder.last_encode_time))
+            acked = encoder.latest_id
+
+        delta_bytes = np.mean([b for b, _ in deltas])
+        delta_ms = np.mean([t for _, t in deltas]) * 1e3
+        print(f"zlib={compress!s:5}  full arrays {raw:>9} B  keyframe {keyframe[0][0]:>8} B "
+              f"({keyframe[0][1] * 1e3:.2f} ms)  delta {delta_bytes:>8.0f} B ({delta_ms:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
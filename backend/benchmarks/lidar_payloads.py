@@ -0,0 +1,43 @@
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+# Make 'lib' and 'app' importable when running a benchmark as a script
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+VOXEL_MAP_SIZE = 80000
+DEFAULT_META = {"origin": [0.0, 0.0, 1.0], "resolution": 0.05}
+
+
+def make_voxel_payload(density, seed=0):
+    """
+    Build a synthetic compressed voxel map for libvoxel.wasm.
+
+    The robot sends an LZ4 block (no size prefix) of an 80000-byte voxel
+    bitmap; `density` is the fraction of non-empty bytes. Requires the
+    `lz4` package, which is only needed for benchmarks.
+    """
+    import lz4.block
+
+    rng = np.random.default_rng(seed)
+    occupied = rng.random(VOXEL_MAP_SIZE) < density
+    voxels = (occupied * rng.integers(0, 256, VOXEL_MAP_SIZE)).astype(np.uint8)
+    return lz4.block.compress(voxels.tobytes(), store_size=False)
+
+
+def lidar_message(payload, meta=DEFAULT_META, stamp=0.0):
+    """
+    Wrap a compressed payload in the ULIDAR_ARRAY wire format:
+    2, 0 (uint16), header length, padding (uint32), JSON header, payload.
+    """
+    header = json.dumps({
+        "type": "msg",
+        "topic": "rt/utlidar/voxel_map_compressed",
+        "data": dict(meta, stamp=stamp, width=[128, 128, 38], src_size=VOXEL_MAP_SIZE),
+    }).encode("utf-8")
+    return struct.pack("<HHII", 2, 0, len(header), 0) + header + payload
@@ -0,0 +1,79 @@
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LidarDecodeCache:
+    """
+    LRU cache in front of LidarDecoder.decode.
+
+    A standing robot keeps sending byte-identical voxel maps, so frames are
+    keyed by a BLAKE2 hash of the compressed bytes plus `origin` and
+    `resolution`. A hit returns the previously decoded result; its arrays
+    are marked read-only because every hit shares them. Entries are
+    evicted least-recently-used once the cached arrays exceed `max_bytes`.
+    """
+
+    def __init__(self, decoder, max_bytes=DEFAULT_MAX_BYTES):
+        self.decoder = decoder
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(compressed_data, data):
+        digest = hashlib.blake2b(compressed_data, digest_size=16).digest()
+        return digest, tuple(data["origin"]), data["resolution"]
+
+    def decode(self, compressed_data, data, **outputs):
+        """
+        Decode through the cache. Passing preallocated output arrays (see
+        LidarDecoder.decode) bypasses it, since the caller wants them filled.
+        """
+        if outputs:
+            return self.decoder.decode(compressed_data, data, **outputs)
+
+        key = self.make_key(compressed_data, data)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        decoded = self.decoder.decode(compressed_data, data)
+        arrays = (decoded["positions"], decoded["uvs"], decoded["indices"])
+        size = sum(array.nbytes for array in arrays)
+
+        if size <= self.max_bytes:
+            for array in arrays:
+                array.flags.writeable = False
+            self.entries[key] = (decoded, size)
+            self.current_bytes += size
+            self._evict()
+        return decoded
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
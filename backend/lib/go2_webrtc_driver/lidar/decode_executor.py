@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+_worker_decoder = None
+
+
+def _init_worker():
+    global _worker_decoder
+    from .lidar_decoder import LidarDecoder
+    from .decode_cache import LidarDecodeCache
+    _worker_decoder = LidarDecodeCache(LidarDecoder())
+
+
+def _decode_in_worker(compressed_data, data):
+    start = time.perf_counter()
+    decoded = _worker_decoder.decode(compressed_data, data)
+    return decoded, time.perf_counter() - start
+
+
+class LidarDecodeExecutor:
+    """
+    Decodes lidar frames in a pool of worker processes.
+
+    Each worker owns its own LidarDecoder, so frames are decoded in parallel
+    and off the event loop. Decoded frames are handed to `on_decoded` in the
+    order they were submitted. When `max_queue` frames are already in flight,
+    `drop_policy` decides whether the oldest pending frame or the new one is
+    dropped.
+    """
+
+    def __init__(self, on_decoded, workers=2, max_queue=4, drop_policy=DROP_OLDEST, mp_context="spawn"):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+
+        self.on_decoded = on_decoded
+        self.max_queue = max_queue
+        self.drop_policy = drop_policy
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(mp_context),
+            initializer=_init_worker,
+        )
+        self.pending = deque()
+        self.pending_event = asyncio.Event()
+        self.deliver_task = None
+
+        self.submitted = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_decode_latency = 0.0
+        self.last_total_latency = 0.0
+        self.total_decode_latency = 0.0
+
+    def submit(self, message, compressed_data):
+        """
+        Queue `message` for decoding; `message['data']['data']` is set to the
+        decoded frame before it is delivered.
+        """
+        if self.deliver_task is None:
+            self.deliver_task = asyncio.get_running_loop().create_task(self._deliver())
+
+        if len(self.pending) >= self.max_queue:
+            self.dropped += 1
+            if self.drop_policy == DROP_NEWEST:
+                return
+            _, _, future = self.pending.popleft()
+            future.cancel()
+
+        future = asyncio.get_running_loop().run_in_executor(
+            self.pool, _decode_in_worker, bytes(compressed_data), message["data"]
+        )
+        self.pending.append((message, time.perf_counter(), future))
+        self.submitted += 1
+        self.pending_event.set()
+
+    async def _deliver(self):
+        while True:
+            if not self.pending:
+                self.pending_event.clear()
+                await self.pending_event.wait()
+                continue
+
+            message, submitted_at, future = self.pending[0]
+            try:
+                decoded, decode_latency = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Dropped while waiting; the entry was already removed
+                continue
+            except Exception:
+                logging.error("Error decoding lidar frame", exc_info=True)
+                self.failed += 1
+                self._pop(future)
+                continue
+
+            if not self._pop(future):
+                continue
+
+            self.last_decode_latency = decode_latency
+            self.last_total_latency = time.perf_counter() - submitted_at
+            self.total_decode_latency += decode_latency
+            self.delivered += 1
+
+            message["data"]["data"] = decoded
+            try:
+                await self.on_decoded(message)
+            except Exception:
+                logging.error("Error delivering lidar frame", exc_info=True)
+
+    def _pop(self, future):
+        """Remove `future` from the head of the queue if it is still there."""
+        if self.pending and self.pending[0][2] is future:
+            self.pending.popleft()
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "queue_depth": len(self.pending),
+            "submitted": self.submitted,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_decode_latency": self.last_decode_latency,
+            "last_total_latency": self.last_total_latency,
+            "avg_decode_latency": self.total_decode_latency / self.delivered if self.delivered else 0.0,
+        }
+
+    def shutdown(self):
+        if self.deliver_task:
+            self.deliver_task.cancel()
+            self.deliver_task = None
+        for _, _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class _Buffer:
+    """A reusable array that only reallocates when a larger size is needed."""
+
+    def __init__(self, dtype, width=None):
+        self.dtype = dtype
+        self.width = width
+        self.array = np.empty(self._shape(0), dtype=dtype)
+
+    def _shape(self, n):
+        return (n,) if self.width is None else (n, self.width)
+
+    def get(self, n):
+        if len(self.array) < n:
+            # Grow geometrically so a slowly growing frame doesn't reallocate every time
+            self.array = np.empty(self._shape(max(n, 2 * len(self.array))), dtype=self.dtype)
+        return self.array[:n]
+
+
+class LidarFrameProcessor:
+    """
+    World transform, ROI crop and voxel-grid downsampling of decoded frames.
+
+    All steps are vectorized and write into buffers owned by the processor,
+    so steady-state processing allocates only small temporaries. The arrays
+    returned are views into those buffers and are overwritten by the next
+    call; copy them if they must outlive it. One processor should be used
+    from one thread at a time.
+    """
+
+    def __init__(self):
+        self._points = _Buffer(np.float32, 3)
+        self._mask = _Buffer(np.bool_)
+        self._scratch = _Buffer(np.float32)
+        self._box = _Buffer(np.float32, 3)
+        self._sphere = _Buffer(np.float32, 3)
+        self._sorted = _Buffer(np.float32, 3)
+        self._cells = _Buffer(np.int64, 3)
+        self._keys = _Buffer(np.int64)
+        self._downsampled = _Buffer(np.float32, 3)
+
+    def world_points(self, decoded, origin, resolution):
+        """(N, 3) float32 world coordinates of the frame's vertices."""
+        positions = decoded["positions"].reshape(-1, 3)
+        points = self._points.get(len(positions))
+        np.multiply(positions, np.float32(resolution), out=points, casting="unsafe")
+        points += np.asarray(origin, dtype=np.float32)
+        return points
+
+    @staticmethod
+    def _select(points, mask, buffer):
+        out = buffer.get(np.count_nonzero(mask))
+        np.compress(mask, points, axis=0, out=out)
+        return out
+
+    def crop_box(self, points, lower, upper):
+        """Points inside the axis-aligned box [lower, upper]."""
+        mask = self._mask.get(len(points))
+        mask[:] = True
+        for axis in range(3):
+            column = points[:, axis]
+            if lower is not None:
+                mask &= column >= lower[axis]
+            if upper is not None:
+                mask &= column <= upper[axis]
+        return self._select(points, mask, self._box)
+
+    def crop_radius(self, points, center, radius, horizontal=False):
+        """Points within `radius` of `center` (in the xy plane if `horizontal`)."""
+        axes = 2 if horizontal else 3
+        distance = self._scratch.get(len(points))
+        distance[:] = 0
+        for axis in range(axes):
+            offset = points[:, axis] - np.float32(center[axis])
+            distance += offset * offset
+        mask = self._mask.get(len(points))
+        np.less_equal(distance, np.float32(radius * radius), out=mask)
+        return self._select(points, mask, self._sphere)
+
+    def downsample(self, points, voxel_size):
+        """One point per occupied `voxel_size` cell: the centroid of its points."""
+        if not len(points):
+            return self._downsampled.get(0)
+
+        cells = self._cells.get(len(points))
+        np.floor_divide(points, np.float32(voxel_size), out=cells, casting="unsafe")
+        cells -= cells.min(axis=0)
+        span = cells.max(axis=0) + 1
+
+        keys = self._keys.get(len(points))
+        np.multiply(cells[:, 0], span[1] * span[2], out=keys)
+        keys += cells[:, 1] * span[2]
+        keys += cells[:, 2]
+
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        counts = np.diff(np.append(starts, len(points))).astype(np.float32)
+
+        out = self._downsampled.get(len(starts))
+        np.add.reduceat(np.take(points, order, axis=0, out=self._sorted.get(len(points))), starts, axis=0, out=out)
+        out /= counts[:, None]
+        return out
+
+    def process(self, decoded, origin, resolution, lower=None, upper=None,
+                center=None, radius=None, voxel_size=None):
+        """
+        World transform, then the optional box crop, radius crop (around
+        `center`, default the frame's bounding-box center) and voxel
+        downsampling, in that order.
+        """
+        points = self.world_points(decoded, origin, resolution)
+        if lower is not None or upper is not None:
+            points = self.crop_box(points, lower, upper)
+        if radius is not None:
+            if center is None:
+                center = (points.min(axis=0) + points.max(axis=0)) / 2 if len(points) else (0, 0, 0)
+            points = self.crop_radius(points, center, radius)
+        if voxel_size is not None:
+            points = self.downsample(points, voxel_size)
+        return points
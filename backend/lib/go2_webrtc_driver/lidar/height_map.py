@@ -0,0 +1,139 @@
+import numpy as np
+
+from .voxel_map import frame_points
+
+NO_HEIGHT = -32768
+
+
+class HeightMap:
+    """
+    Rolling 2.5D height map around the robot built from decoded lidar frames.
+
+    The grid is `size` x `size` cells of `resolution` metres and follows the
+    robot: when a frame's center drifts more than `recenter_distance` from
+    the grid center, the grid is shifted by whole cells. Every cell a frame
+    touches gets that frame's max/min height, and traversability is
+    recomputed from the height slope only in the touched window. Unknown
+    cells hold NaN heights and zero traversability.
+    """
+
+    def __init__(self, resolution=0.1, size=200, max_slope=1.0, recenter_distance=None):
+        self.resolution = resolution
+        self.size = size
+        self.max_slope = max_slope
+        self.recenter_distance = recenter_distance or size * resolution / 4
+
+        self.max_height = np.full((size, size), np.nan, dtype=np.float32)
+        self.min_height = np.full((size, size), np.nan, dtype=np.float32)
+        # 0 = unknown or blocked, 255 = flat ground
+        self.traversability = np.zeros((size, size), dtype=np.uint8)
+
+        # World coordinates of the corner of cell (0, 0), a multiple of resolution
+        self.origin = None
+        self.frames = 0
+
+    def integrate_message(self, message):
+        data = message["data"]
+        self.integrate(data["data"], data["origin"], data["resolution"])
+
+    def integrate(self, decoded, origin, resolution):
+        points = frame_points(decoded, origin, resolution)
+        if not len(points):
+            return
+
+        center = (points[:, :2].min(axis=0) + points[:, :2].max(axis=0)).astype(np.float64) / 2
+        self._follow(center)
+
+        cells = np.floor((points[:, :2] - self.origin) / self.resolution).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < self.size), axis=1)
+        cells = cells[inside]
+        z = points[inside, 2]
+        if not len(z):
+            return
+        flat = cells[:, 1] * self.size + cells[:, 0]
+
+        # With duplicate indices the last write wins, so writing in ascending
+        # height order leaves each cell's max (descending leaves its min)
+        order = np.argsort(z, kind="stable")
+        self.max_height.ravel()[flat[order]] = z[order]
+        order = order[::-1]
+        self.min_height.ravel()[flat[order]] = z[order]
+
+        lower = np.maximum(cells.min(axis=0) - 1, 0)
+        upper = np.minimum(cells.max(axis=0) + 2, self.size)
+        self._update_traversability(lower, upper)
+        self.frames += 1
+
+    def _follow(self, center):
+        half = self.size * self.resolution / 2
+        if self.origin is None:
+            self.origin = np.round((center - half) / self.resolution) * self.resolution
+            return
+
+        grid_center = self.origin + half
+        if np.max(np.abs(center - grid_center)) <= self.recenter_distance:
+            return
+
+        shift = np.round((center - grid_center) / self.resolution).astype(np.int64)
+        self.origin = self.origin + shift * self.resolution
+        for grid, empty in ((self.max_height, np.nan), (self.min_height, np.nan), (self.traversability, 0)):
+            self._shift(grid, shift, empty)
+
+    def _shift(self, grid, shift, empty):
+        """Move `grid` contents by -shift cells (x, y), filling vacated cells."""
+        dx, dy = shift
+        moved = np.full_like(grid, empty)
+        size = self.size
+        if abs(dx) < size and abs(dy) < size:
+            src_x = slice(max(dx, 0), size + min(dx, 0))
+            dst_x = slice(max(-dx, 0), size + min(-dx, 0))
+            src_y = slice(max(dy, 0), size + min(dy, 0))
+            dst_y = slice(max(-dy, 0), size + min(-dy, 0))
+            moved[dst_y, dst_x] = grid[src_y, src_x]
+        grid[:] = moved
+
+    def _update_traversability(self, lower, upper):
+        # Include a one-cell border so the gradient at the window edge is valid
+        x0, y0 = np.maximum(lower - 1, 0)
+        x1, y1 = np.minimum(upper + 1, self.size)
+        window = self.max_height[y0:y1, x0:x1]
+        if min(window.shape) < 2:
+            return
+
+        gy, gx = np.gradient(window, self.resolution)
+        slope = np.hypot(gx, gy)
+        score = np.clip(1.0 - slope / self.max_slope, 0.0, 1.0) * 255
+        score = np.nan_to_num(score, nan=0.0).astype(np.uint8)
+
+        inner_y = slice(lower[1] - y0, upper[1] - y0)
+        inner_x = slice(lower[0] - x0, upper[0] - x0)
+        self.traversability[lower[1]:upper[1], lower[0]:upper[0]] = score[inner_y, inner_x]
+
+    def clear(self):
+        self.max_height.fill(np.nan)
+        self.min_height.fill(np.nan)
+        self.traversability.fill(0)
+        self.origin = None
+        self.frames = 0
+
+    def header(self):
+        return {
+            "width": self.size,
+            "height": self.size,
+            "resolution": self.resolution,
+            "origin": [float(v) for v in self.origin] if self.origin is not None else [0.0, 0.0],
+            "frames": self.frames,
+        }
+
+    def to_bytes(self):
+        """
+        Compact binary form of the grid, row-major with y as rows:
+        max height and min height as little-endian int16 millimetres
+        (NO_HEIGHT for unknown cells), then traversability as uint8.
+        """
+        out = bytearray()
+        for grid in (self.max_height, self.min_height):
+            mm = np.nan_to_num(grid * 1000, nan=NO_HEIGHT)
+            out += np.clip(mm, NO_HEIGHT, 32767).astype("<i2").tobytes()
+        out += self.traversability.tobytes()
+        return bytes(out)
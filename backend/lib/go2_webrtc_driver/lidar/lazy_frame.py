@@ -0,0 +1,34 @@
+class LazyLidarData(dict):
+    """
+    The `data` field of a binary lidar message, decoded on first use.
+
+    Behaves like the header dict (`origin`, `resolution`, ...) and keeps a
+    memoryview of the compressed payload in `compressed`. The decoded frame
+    is only produced when `data` is read, through `self["data"]` or
+    `self.get("data")`, and is then cached. Subscribers that only look at
+    the header or forward `compressed` never pay for the decode.
+    """
+
+    def __init__(self, header, compressed, decode):
+        super().__init__(header)
+        self.compressed = compressed
+        self._decode = decode
+
+    @property
+    def decoded(self):
+        return dict.__contains__(self, "data")
+
+    def __missing__(self, key):
+        if key != "data":
+            raise KeyError(key)
+        decoded = self._decode(self.compressed, self)
+        self["data"] = decoded
+        return decoded
+
+    def __contains__(self, key):
+        return key == "data" or super().__contains__(key)
+
+    def get(self, key, default=None):
+        if key == "data":
+            return self["data"]
+        return super().get(key, default)
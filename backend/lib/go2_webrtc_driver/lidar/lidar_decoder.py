@@ -21,23 +21,82 @@
 
 import math
 import ctypes
+import hashlib
+import logging
 import numpy as np
 import os
+import tempfile
+from importlib import metadata
 
 from wasmtime import Config, Engine, Store, Module, Instance, Func, FuncType
 from wasmtime import ValType
 
+WASM_PATH = os.path.join(os.path.dirname(__file__), "libvoxel.wasm")
+
+# Directory holding precompiled modules; override with GO2_WASM_CACHE_DIR,
+# set it to an empty string to disable the cache.
+CACHE_DIR = os.environ.get(
+    "GO2_WASM_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "go2_webrtc_driver"),
+)
+
+
+def _cache_path(wasm_bytes):
+    wasm_hash = hashlib.sha256(wasm_bytes).hexdigest()[:16]
+    try:
+        wasmtime_version = metadata.version("wasmtime")
+    except metadata.PackageNotFoundError:
+        wasmtime_version = "unknown"
+    return os.path.join(CACHE_DIR, f"libvoxel-{wasm_hash}-wasmtime-{wasmtime_version}.cwasm")
+
+
+def load_module(engine, wasm_path=WASM_PATH):
+    """
+    Load libvoxel.wasm, reusing a compiled module from the on-disk cache.
+
+    The cache is keyed by the wasm hash and the wasmtime version, so a new
+    wasm file or wasmtime upgrade triggers a recompile. Any cache failure
+    falls back to compiling in memory.
+    """
+    with open(wasm_path, "rb") as f:
+        wasm_bytes = f.read()
+
+    if not CACHE_DIR:
+        return Module(engine, wasm_bytes)
+
+    cache_path = _cache_path(wasm_bytes)
+    if os.path.exists(cache_path):
+        try:
+            return Module.deserialize_file(engine, cache_path)
+        except Exception as e:
+            logging.warning(f"Ignoring unusable lidar module cache {cache_path}: {e}")
+
+    module = Module(engine, wasm_bytes)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(module.serialize())
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logging.warning(f"Could not write lidar module cache {cache_path}: {e}")
+    return module
+
 
 class LidarDecoder:
+    INPUT_SIZE = 61440
+    DECOMPRESS_BUFFER_SIZE = 80000
+    POSITIONS_SIZE = 2880000
+    UVS_SIZE = 1920000
+    INDICES_SIZE = 5760000
+
     def __init__(self) -> None:
 
         config = Config()
         config.wasm_multi_value = True
-        config.debug_info = True
         self.store = Store(Engine(config))
 
-        wasm_path = os.path.join(os.path.dirname(__file__), "libvoxel.wasm")
-        self.module = Module.from_file(self.store.engine, wasm_path)
+        self.module = load_module(self.store.engine)
 
         self.a_callback_type = FuncType([ValType.i32()], [ValType.i32()])
         self.b_callback_type = FuncType([ValType.i32(), ValType.i32(), ValType.i32()], [])
@@ -52,71 +111,120 @@ class LidarDecoder:
         self.free = self.instance.exports(self.store)["g"]
         self.wasm_memory = self.instance.exports(self.store)["c"]
 
-        self.buffer = self.wasm_memory.data_ptr(self.store)
-        self.memory_size = self.wasm_memory.data_len(self.store)
-
-        self.buffer_ptr = int.from_bytes(self.buffer, "little")
-
-        self.HEAP8 = (ctypes.c_int8 * self.memory_size).from_address(self.buffer_ptr)
-        self.HEAP16 = (ctypes.c_int16 * (self.memory_size // 2)).from_address(self.buffer_ptr)
-        self.HEAP32 = (ctypes.c_int32 * (self.memory_size // 4)).from_address(self.buffer_ptr)
-        self.HEAPU8 = (ctypes.c_uint8 * self.memory_size).from_address(self.buffer_ptr)
-        self.HEAPU16 = (ctypes.c_uint16 * (self.memory_size // 2)).from_address(self.buffer_ptr)
-        self.HEAPU32 = (ctypes.c_uint32 * (self.memory_size // 4)).from_address(self.buffer_ptr)
-        self.HEAPF32 = (ctypes.c_float * (self.memory_size // 4)).from_address(self.buffer_ptr)
-        self.HEAPF64 = (ctypes.c_double * (self.memory_size // 8)).from_address(self.buffer_ptr)
-
-        self.input = self.malloc(self.store, 61440)
-        self.decompressBuffer = self.malloc(self.store, 80000)
-        self.positions = self.malloc(self.store, 2880000)
-        self.uvs = self.malloc(self.store, 1920000)
-        self.indices = self.malloc(self.store, 5760000)
+        self.buffer_ptr = None
+        self.memory_size = 0
+        self.update_views()
+
+        self.input = self.malloc(self.store, self.INPUT_SIZE)
+        self.decompressBuffer = self.malloc(self.store, self.DECOMPRESS_BUFFER_SIZE)
+        self.positions = self.malloc(self.store, self.POSITIONS_SIZE)
+        self.uvs = self.malloc(self.store, self.UVS_SIZE)
+        self.indices = self.malloc(self.store, self.INDICES_SIZE)
         self.decompressedSize = self.malloc(self.store, 4)
         self.faceCount = self.malloc(self.store, 4)
         self.pointCount = self.malloc(self.store, 4)
-        self.decompressBufferSize = 80000
+        self.decompressBufferSize = self.DECOMPRESS_BUFFER_SIZE
+
+    def update_views(self):
+        """
+        (Re)build the NumPy views over the WASM linear memory.
+
+        The views alias the memory directly, so they must be rebuilt whenever
+        the memory is grown (which may also move it). Returns True if the
+        views changed.
+        """
+        buffer_ptr = ctypes.addressof(self.wasm_memory.data_ptr(self.store).contents)
+        memory_size = self.wasm_memory.data_len(self.store)
+        if buffer_ptr == self.buffer_ptr and memory_size == self.memory_size:
+            return False
+
+        self.buffer_ptr = buffer_ptr
+        self.memory_size = memory_size
+
+        raw = (ctypes.c_uint8 * memory_size).from_address(buffer_ptr)
+        self.HEAPU8 = np.frombuffer(raw, dtype=np.uint8)
+        self.HEAP8 = self.HEAPU8.view(np.int8)
+        self.HEAP16 = self.HEAPU8[:memory_size - memory_size % 2].view(np.int16)
+        self.HEAP32 = self.HEAPU8[:memory_size - memory_size % 4].view(np.int32)
+        self.HEAPU16 = self.HEAP16.view(np.uint16)
+        self.HEAPU32 = self.HEAP32.view(np.uint32)
+        self.HEAPF32 = self.HEAP32.view(np.float32)
+        self.HEAPF64 = self.HEAPU8[:memory_size - memory_size % 8].view(np.float64)
+        return True
 
     def adjust_memory_size(self, t):
-        return len(self.HEAPU8)
+        # emscripten_resize_heap: grow the memory to at least t bytes
+        requested = t & 0xFFFFFFFF
+        current = self.wasm_memory.data_len(self.store)
+        if requested > current:
+            pages = -(-(requested - current) // 65536)
+            try:
+                self.wasm_memory.grow(self.store, pages)
+            except Exception:
+                return 0
+        self.update_views()
+        return 1
 
     def copy_within(self, target, start, end):
-        # Copy the sublist for the specified range [start:end]
-        sublist = self.HEAPU8[start:end]
-
-        # Replace elements in the list starting from index 'target'
-        for i in range(len(sublist)):
-            if target + i < len(self.HEAPU8):
-                self.HEAPU8[target + i] = sublist[i]
-    
+        # NumPy handles overlapping source and destination ranges
+        end = min(end, self.memory_size, start + self.memory_size - target)
+        if end > start:
+            self.HEAPU8[target:target + end - start] = self.HEAPU8[start:end]
+
     def copy_memory_region(self, t, n, a):
+        self.update_views()
         self.copy_within(t, n, n + a)
 
     def get_value(self, t, n="i8"):
         if n.endswith("*"):
             n = "*"
         if n == "i1" or n == "i8":
-            return self.HEAP8[t]
+            return int(self.HEAP8[t])
         elif n == "i16":
-            return self.HEAP16[t >> 1]
+            return int(self.HEAP16[t >> 1])
         elif n == "i32" or n == "i64":
-            return self.HEAP32[t >> 2]
+            return int(self.HEAP32[t >> 2])
         elif n == "float":
-            return self.HEAPF32[t >> 2]
+            return float(self.HEAPF32[t >> 2])
         elif n == "double":
-            return self.HEAPF64[t >> 3]
+            return float(self.HEAPF64[t >> 3])
         elif n == "*":
-            return self.HEAPU32[t >> 2]
+            return int(self.HEAPU32[t >> 2])
         else:
             raise ValueError(f"invalid type for getValue: {n}")
-        
+
     def add_value_arr(self, start, value):
+        value = np.frombuffer(value, dtype=np.uint8)
         if start + len(value) <= len(self.HEAPU8):
-            for i, byte in enumerate(value):
-                self.HEAPU8[start + i] = byte
+            self.HEAPU8[start:start + len(value)] = value
         else:
             raise ValueError("Not enough space to insert bytes at the specified index.")
 
-    def decode(self, compressed_data, data):
+    @staticmethod
+    def _read_output(view, out, dtype):
+        """Copy a view of WASM memory into `out` (if given) or a fresh array."""
+        count = len(view) // np.dtype(dtype).itemsize
+        if out is None:
+            return view.view(dtype).copy()
+        if out.dtype != dtype or len(out) < count:
+            raise ValueError(f"Output array must be {dtype} with at least {count} elements.")
+        result = out[:count]
+        result.view(np.uint8)[:] = view
+        return result
+
+    def decode(self, compressed_data, data, positions=None, uvs=None, indices=None):
+        """
+        Decode a compressed voxel map.
+
+        `positions`, `uvs` (uint8) and `indices` (uint32) may be passed as
+        preallocated 1-D arrays to be filled and reused between calls; the
+        returned arrays are then slices of them. Otherwise fresh arrays are
+        allocated.
+        """
+        if len(compressed_data) > self.INPUT_SIZE:
+            raise ValueError(f"Compressed data exceeds {self.INPUT_SIZE} bytes.")
+
+        self.update_views()
         self.add_value_arr(self.input, compressed_data)
 
         some_v = math.floor(data["origin"][2] / data["resolution"])
@@ -136,21 +244,16 @@ class LidarDecoder:
             some_v
         )
 
+        self.update_views()
+
         self.get_value(self.decompressedSize, "i32")
         c = self.get_value(self.pointCount, "i32")
         u = self.get_value(self.faceCount, "i32")
 
-        positions_slice = self.HEAPU8[self.positions:self.positions + u * 12]
-        positions_copy = bytearray(positions_slice)
-        p = np.frombuffer(positions_copy, dtype=np.uint8)
-
-        uvs_slice = self.HEAPU8[self.uvs:self.uvs + u * 8]
-        uvs_copy = bytearray(uvs_slice)
-        r = np.frombuffer(uvs_copy, dtype=np.uint8)
-
-        indices_slice = self.HEAPU8[self.indices:self.indices + u * 24]
-        indices_copy = bytearray(indices_slice)
-        o = np.frombuffer(indices_copy, dtype=np.uint32)
+        heap = self.HEAPU8
+        p = self._read_output(heap[self.positions:self.positions + u * 12], positions, np.uint8)
+        r = self._read_output(heap[self.uvs:self.uvs + u * 8], uvs, np.uint8)
+        o = self._read_output(heap[self.indices:self.indices + u * 24], indices, np.uint32)
 
         return {
             "point_count": c,
@@ -0,0 +1,71 @@
+import numpy as np
+
+_PCD_TYPES = {
+    ("F", 4): "f4", ("F", 8): "f8",
+    ("U", 1): "u1", ("U", 2): "u2", ("U", 4): "u4", ("U", 8): "u8",
+    ("I", 1): "i1", ("I", 2): "i2", ("I", 4): "i4", ("I", 8): "i8",
+}
+
+
+def read_pcd_header(path):
+    """Parse a PCD header; returns (fields dict, byte offset of the data)."""
+    header = {}
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path}: PCD header has no DATA line")
+            text = line.decode("ascii", errors="replace").strip()
+            if not text or text.startswith("#"):
+                continue
+            key, _, value = text.partition(" ")
+            header[key.upper()] = value.split()
+            if key.upper() == "DATA":
+                return header, f.tell()
+
+
+def pcd_dtype(header):
+    fields = header["FIELDS"]
+    sizes = [int(v) for v in header["SIZE"]]
+    types = header["TYPE"]
+    counts = [int(v) for v in header.get("COUNT", ["1"] * len(fields))]
+
+    dtype = []
+    for i, (name, size, kind, count) in enumerate(zip(fields, sizes, types, counts)):
+        base = "<" + _PCD_TYPES[(kind, size)]
+        # PCL pads with "_" fields; give them unique names
+        name = f"_{i}" if name == "_" else name
+        dtype.append((name, base) if count == 1 else (name, base, (count,)))
+    return np.dtype(dtype)
+
+
+def load_pcd(path):
+    """
+    Open a PCD point cloud as a structured NumPy array.
+
+    Binary PCD files are memory-mapped read-only, so a large map (e.g. the
+    uSLAM uslam_final_pcd download) is paged in only as fields are read:
+    `cloud["x"]` is a strided view over the file. ASCII files are parsed
+    into memory; binary_compressed files are not supported.
+    """
+    header, offset = read_pcd_header(path)
+    dtype = pcd_dtype(header)
+    points = int(header["POINTS"][0]) if "POINTS" in header else \
+        int(header["WIDTH"][0]) * int(header["HEIGHT"][0])
+    data = header["DATA"][0].lower()
+
+    if data == "binary":
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(points,))
+    if data == "ascii":
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return np.loadtxt(f, dtype=dtype, ndmin=1, max_rows=points)
+    raise ValueError(f"{path}: unsupported PCD data format '{data}'")
+
+
+def pcd_xyz(cloud):
+    """(N, 3) float32 copy of the x, y, z fields."""
+    xyz = np.empty((len(cloud), 3), dtype=np.float32)
+    for axis, name in enumerate("xyz"):
+        xyz[:, axis] = cloud[name]
+    return xyz
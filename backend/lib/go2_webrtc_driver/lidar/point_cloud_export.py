@@ -0,0 +1,81 @@
+import numpy as np
+
+CHUNK_POINTS = 65536
+
+
+def _selected_chunks(points, lower=None, upper=None, decimate=1, chunk_points=CHUNK_POINTS):
+    """
+    Yield the points inside [lower, upper] keeping every `decimate`-th one,
+    one chunk at a time so no full-size copy is made.
+    """
+    seen = 0
+    for start in range(0, len(points), chunk_points):
+        chunk = points[start:start + chunk_points]
+        if lower is not None:
+            chunk = chunk[np.all(chunk >= lower, axis=1)]
+        if upper is not None:
+            chunk = chunk[np.all(chunk <= upper, axis=1)]
+        if decimate > 1:
+            # Keep the points whose rank among all selected points is a multiple of `decimate`
+            first = -seen % decimate
+            seen += len(chunk)
+            chunk = chunk[first::decimate]
+        if len(chunk):
+            yield np.ascontiguousarray(chunk, dtype="<f4")
+
+
+def count_selected(points, lower=None, upper=None, decimate=1, chunk_points=CHUNK_POINTS):
+    if lower is None and upper is None:
+        return -(-len(points) // decimate)
+    selected = 0
+    for start in range(0, len(points), chunk_points):
+        chunk = points[start:start + chunk_points]
+        mask = np.ones(len(chunk), dtype=bool)
+        if lower is not None:
+            mask &= np.all(chunk >= lower, axis=1)
+        if upper is not None:
+            mask &= np.all(chunk <= upper, axis=1)
+        selected += np.count_nonzero(mask)
+    return -(-selected // decimate)
+
+
+def iter_ply(points, lower=None, upper=None, decimate=1, chunk_points=CHUNK_POINTS):
+    """Yield a binary little-endian PLY file of (N, 3) `points` in chunks."""
+    count = count_selected(points, lower, upper, decimate, chunk_points)
+    yield (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {count}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "end_header\n"
+    ).encode("ascii")
+    for chunk in _selected_chunks(points, lower, upper, decimate, chunk_points):
+        yield chunk.tobytes()
+
+
+def iter_pcd(points, lower=None, upper=None, decimate=1, chunk_points=CHUNK_POINTS):
+    """Yield a binary PCD (v0.7) file of (N, 3) `points` in chunks."""
+    count = count_selected(points, lower, upper, decimate, chunk_points)
+    yield (
+        "# .PCD v0.7 - Point Cloud Data file format\n"
+        "VERSION 0.7\n"
+        "FIELDS x y z\n"
+        "SIZE 4 4 4\n"
+        "TYPE F F F\n"
+        "COUNT 1 1 1\n"
+        f"WIDTH {count}\n"
+        "HEIGHT 1\n"
+        "VIEWPOINT 0 0 0 1 0 0 0\n"
+        f"POINTS {count}\n"
+        "DATA binary\n"
+    ).encode("ascii")
+    for chunk in _selected_chunks(points, lower, upper, decimate, chunk_points):
+        yield chunk.tobytes()
+
+
+EXPORTERS = {
+    "ply": iter_ply,
+    "pcd": iter_pcd,
+}
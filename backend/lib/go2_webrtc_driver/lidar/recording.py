@@ -0,0 +1,169 @@
+import asyncio
+import inspect
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"G2LIDAR1"
+RECORD_HEADER = struct.Struct("<dI")
+
+# One entry per frame in the sidecar index file
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("timestamp", "<f8")])
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+class LidarRecorder:
+    """
+    Appends raw binary lidar messages, exactly as they reach
+    WebRTCDataChannel.deal_array_buffer (JSON header and compressed voxel
+    payload), to a recording file.
+
+    Each record is a (timestamp, length) header followed by the message.
+    A sidecar `.idx` file gets one INDEX_DTYPE entry per record so readers
+    can seek to any frame without scanning. Both files are append-only, so
+    a recording can be resumed by opening it again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.data_file = open(path, "ab")
+        if new:
+            self.data_file.write(MAGIC)
+        self.index_file = open(index_path(path), "ab")
+        self.frames = 0
+
+    def write(self, message, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self.data_file.write(RECORD_HEADER.pack(timestamp, len(message)))
+        offset = self.data_file.tell()
+        self.data_file.write(message)
+
+        entry = np.array([(offset, len(message), timestamp)], dtype=INDEX_DTYPE)
+        self.index_file.write(entry.tobytes())
+        self.frames += 1
+
+    def flush(self):
+        self.data_file.flush()
+        self.index_file.flush()
+
+    def close(self):
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LidarRecording:
+    """
+    Memory-mapped reader for a LidarRecorder file.
+
+    Frames are returned as memoryviews into the mapping, so replaying
+    never copies the recording into Python objects. If the index is
+    missing or shorter than the data (e.g. the recorder was killed), it is
+    rebuilt by scanning the record headers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a lidar recording")
+        self.data = memoryview(self.mmap)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        index = np.empty(0, dtype=INDEX_DTYPE)
+        if os.path.exists(index_path(self.path)):
+            raw = np.fromfile(index_path(self.path), dtype=np.uint8)
+            index = raw[:len(raw) - len(raw) % INDEX_DTYPE.itemsize].view(INDEX_DTYPE)
+
+        end = int(index["offset"][-1] + index["length"][-1]) if len(index) else len(MAGIC)
+        if end > len(self.mmap):
+            index, end = np.empty(0, dtype=INDEX_DTYPE), len(MAGIC)
+        if end == len(self.mmap):
+            return index
+        return np.concatenate((index, self._scan(end)))
+
+    def _scan(self, position):
+        entries = []
+        while position + RECORD_HEADER.size <= len(self.mmap):
+            timestamp, length = RECORD_HEADER.unpack_from(self.mmap, position)
+            offset = position + RECORD_HEADER.size
+            if offset + length > len(self.mmap):
+                break  # Truncated last record
+            entries.append((offset, length, timestamp))
+            position = offset + length
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        entry = self.index[i]
+        offset = int(entry["offset"])
+        return self.data[offset:offset + int(entry["length"])]
+
+    @property
+    def timestamps(self):
+        return self.index["timestamp"]
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0
+
+    def frames(self, start=0, stop=None):
+        for i in range(start, len(self) if stop is None else stop):
+            yield float(self.index[i]["timestamp"]), self[i]
+
+    async def replay(self, handle, speed=1.0, start=0, stop=None):
+        """
+        Feed frames to `handle(message)` (a function or coroutine function),
+        paced by their recorded timestamps divided by `speed`. A `speed` of
+        None or 0 replays as fast as possible. Returns the number of frames.
+        """
+        count = 0
+        began = time.perf_counter()
+        first = None
+        for timestamp, message in self.frames(start, stop):
+            if speed:
+                if first is None:
+                    first = timestamp
+                delay = (timestamp - first) / speed - (time.perf_counter() - began)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            result = handle(message)
+            if inspect.isawaitable(result):
+                await result
+            count += 1
+        return count
+
+    def close(self):
+        if getattr(self, "data", None) is not None:
+            self.data.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # Frames handed out are still alive (e.g. held by a lazy
+            # message); the mapping is unmapped once they are released
+            pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
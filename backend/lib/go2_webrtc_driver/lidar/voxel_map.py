@@ -0,0 +1,159 @@
+import time
+
+import numpy as np
+
+# Cells are packed into one int64 key, 21 bits per axis
+_AXIS_BITS = 21
+_AXIS_OFFSET = 1 << (_AXIS_BITS - 1)
+_AXIS_MASK = (1 << _AXIS_BITS) - 1
+
+
+def pack_cells(cells):
+    """Pack an (N, 3) array of integer cell coordinates into int64 keys."""
+    cells = cells.astype(np.int64) + _AXIS_OFFSET
+    return (cells[:, 0] << (2 * _AXIS_BITS)) | (cells[:, 1] << _AXIS_BITS) | cells[:, 2]
+
+
+def unpack_cells(keys):
+    cells = np.empty((len(keys), 3), dtype=np.int64)
+    cells[:, 0] = keys >> (2 * _AXIS_BITS)
+    cells[:, 1] = (keys >> _AXIS_BITS) & _AXIS_MASK
+    cells[:, 2] = keys & _AXIS_MASK
+    return cells - _AXIS_OFFSET
+
+
+def frame_points(decoded, origin, resolution):
+    """World coordinates (float32, (N, 3)) of a decoded voxel frame's vertices."""
+    points = decoded["positions"].reshape(-1, 3).astype(np.float32)
+    points *= resolution
+    points += np.asarray(origin, dtype=np.float32)
+    return points
+
+
+class VoxelMap:
+    """
+    Persistent sparse voxel map built from decoded lidar frames.
+
+    Occupied cells are kept as a sorted array of packed int64 keys with
+    parallel hit-count and last-seen arrays, so merging a frame is a few
+    vectorized searchsorted/insert calls. `voxel_size` defaults to the
+    resolution of the first frame. Memory is bounded by `max_voxels`:
+    every `evict_interval` frames cells farther than `max_distance` from the
+    latest frame are dropped, and once the map is over capacity the
+    farthest cells are dropped until it is at `trim_ratio` of it.
+    """
+
+    def __init__(self, voxel_size=None, max_voxels=500000, max_distance=None, evict_interval=10, trim_ratio=0.9):
+        self.voxel_size = voxel_size
+        self.max_voxels = max_voxels
+        self.max_distance = max_distance
+        self.evict_interval = evict_interval
+        self.trim_ratio = trim_ratio
+
+        self.keys = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.uint32)
+        self.last_seen = np.empty(0, dtype=np.float64)
+
+        self.center = np.zeros(3, dtype=np.float32)
+        self.frames = 0
+        self.evicted = 0
+
+    def integrate_message(self, message, timestamp=None):
+        """Merge a ULIDAR_ARRAY message whose `data` has been decoded (or is lazy)."""
+        data = message["data"]
+        self.integrate(data["data"], data["origin"], data["resolution"], timestamp)
+
+    def integrate(self, decoded, origin, resolution, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if self.voxel_size is None:
+            self.voxel_size = resolution
+
+        points = frame_points(decoded, origin, resolution)
+        if not len(points):
+            return
+        self.center = points.mean(axis=0)
+
+        cells = np.floor(points / self.voxel_size)
+        frame_keys = pack_cells(cells)
+        frame_keys.sort()
+        frame_keys = frame_keys[np.concatenate(([True], frame_keys[1:] != frame_keys[:-1]))]
+
+        idx = np.searchsorted(self.keys, frame_keys)
+        if len(self.keys):
+            found = self.keys[np.minimum(idx, len(self.keys) - 1)] == frame_keys
+        else:
+            found = np.zeros(len(frame_keys), dtype=bool)
+
+        seen = idx[found]
+        self.hits[seen] += 1
+        self.last_seen[seen] = timestamp
+
+        new = ~found
+        self.keys = np.insert(self.keys, idx[new], frame_keys[new])
+        self.hits = np.insert(self.hits, idx[new], 1)
+        self.last_seen = np.insert(self.last_seen, idx[new], timestamp)
+
+        self.frames += 1
+        self._evict()
+
+    def _evict(self):
+        by_distance = self.max_distance is not None and self.frames % self.evict_interval == 0
+        if not by_distance and len(self.keys) <= self.max_voxels:
+            return
+
+        offset = self.cell_centers() - self.center
+        distance = np.einsum("ij,ij->i", offset, offset)
+        keep = np.ones(len(self.keys), dtype=bool)
+        if self.max_distance is not None:
+            keep &= distance <= self.max_distance ** 2
+        if np.count_nonzero(keep) > self.max_voxels:
+            target = max(1, int(self.max_voxels * self.trim_ratio))
+            distance[~keep] = np.inf
+            nearest = np.argpartition(distance, target - 1)[:target]
+            keep[:] = False
+            keep[nearest] = True
+
+        if not keep.all():
+            self.evicted += int(len(keep) - np.count_nonzero(keep))
+            self.keys = self.keys[keep]
+            self.hits = self.hits[keep]
+            self.last_seen = self.last_seen[keep]
+
+    def cell_centers(self, keys=None):
+        keys = self.keys if keys is None else keys
+        return ((unpack_cells(keys) + 0.5) * (self.voxel_size or 1.0)).astype(np.float32)
+
+    def snapshot(self):
+        """Copy of the map: cell centers (N, 3), hit counts and last-seen times."""
+        return {
+            "voxel_size": self.voxel_size,
+            "centers": self.cell_centers(),
+            "hits": self.hits.copy(),
+            "last_seen": self.last_seen.copy(),
+        }
+
+    def query_bbox(self, lower, upper):
+        """Snapshot of the cells whose centers lie inside the box [lower, upper]."""
+        centers = self.cell_centers()
+        inside = np.all((centers >= np.asarray(lower)) & (centers <= np.asarray(upper)), axis=1)
+        return {
+            "voxel_size": self.voxel_size,
+            "centers": centers[inside],
+            "hits": self.hits[inside],
+            "last_seen": self.last_seen[inside],
+        }
+
+    def clear(self):
+        self.keys = self.keys[:0]
+        self.hits = self.hits[:0]
+        self.last_seen = self.last_seen[:0]
+        self.frames = 0
+
+    def stats(self):
+        return {
+            "voxels": len(self.keys),
+            "frames": self.frames,
+            "evicted": self.evicted,
+            "bytes": self.keys.nbytes + self.hits.nbytes + self.last_seen.nbytes,
+        }
@@ -0,0 +1,115 @@
+import struct
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from .voxel_map import frame_points, pack_cells, unpack_cells
+
+KEYFRAME = 0
+DELTA = 1
+
+FLAG_ZLIB = 1
+
+# type, flags, frame id, base frame id, voxel size, anchor cell (x, y, z),
+# added count, removed count. Followed by the added then removed cells as
+# uint16 (x, y, z) offsets from the anchor; zlib covers only the cells.
+HEADER = struct.Struct("<BBIIf3iII")
+
+
+class VoxelDeltaEncoder:
+    """
+    Encodes lidar frames as voxel sets for streaming to viewers.
+
+    Each frame is reduced to its occupied cells (packed int64 keys at the
+    frame resolution). encode() sends a keyframe with every cell, or, given
+    the last frame a viewer acknowledged, only the cells added and removed
+    since then. The last `history` frames are kept as delta bases; older
+    acknowledgements get a keyframe. Cells are quantized to uint16 offsets
+    from a per-message anchor cell.
+    """
+
+    def __init__(self, history=30):
+        self.history = history
+        self.frames = OrderedDict()
+        self.latest_id = None
+        self.voxel_size = None
+        self.next_id = 1
+
+        self.encoded = 0
+        self.last_encode_time = 0.0
+        self.last_bytes = 0
+        self.total_encode_time = 0.0
+        self.total_bytes = 0
+
+    def add_frame(self, decoded, origin, resolution):
+        """Store a decoded frame and return its frame id."""
+        if self.voxel_size is not None and resolution != self.voxel_size:
+            # Cells from different resolutions can't be diffed
+            self.frames.clear()
+        self.voxel_size = resolution
+
+        points = frame_points(decoded, origin, resolution)
+        keys = pack_cells(np.floor(points / resolution))
+        keys.sort()
+        if len(keys):
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+
+        frame_id = self.next_id
+        self.next_id = (self.next_id + 1) & 0xFFFFFFFF or 1
+        self.frames[frame_id] = keys
+        while len(self.frames) > self.history:
+            self.frames.popitem(last=False)
+        self.latest_id = frame_id
+        return frame_id
+
+    def encode(self, base_id=None, compress=False):
+        """Encode the latest frame against `base_id` (a keyframe if it is unknown)."""
+        if self.latest_id is None:
+            return None
+
+        start = time.perf_counter()
+        current = self.frames[self.latest_id]
+        base = self.frames.get(base_id) if base_id else None
+        if base is None:
+            msg_type, base_id = KEYFRAME, 0
+            added, removed = current, current[:0]
+        else:
+            msg_type = DELTA
+            added = np.setdiff1d(current, base, assume_unique=True)
+            removed = np.setdiff1d(base, current, assume_unique=True)
+
+        cells = unpack_cells(np.concatenate((added, removed)))
+        anchor = cells.min(axis=0) if len(cells) else np.zeros(3, dtype=np.int64)
+        body = (cells - anchor).astype("<u2").tobytes()
+
+        flags = 0
+        if compress:
+            body = zlib.compress(body, 1)
+            flags |= FLAG_ZLIB
+
+        header = HEADER.pack(
+            msg_type, flags, self.latest_id, base_id, self.voxel_size,
+            *(int(v) for v in anchor), len(added), len(removed),
+        )
+        payload = header + body
+
+        elapsed = time.perf_counter() - start
+        self.encoded += 1
+        self.last_encode_time = elapsed
+        self.last_bytes = len(payload)
+        self.total_encode_time += elapsed
+        self.total_bytes += len(payload)
+        return payload
+
+    def stats(self):
+        return {
+            "frames": len(self.frames),
+            "latest_id": self.latest_id,
+            "encoded": self.encoded,
+            "last_encode_time": self.last_encode_time,
+            "last_bytes": self.last_bytes,
+            "avg_encode_time": self.total_encode_time / self.encoded if self.encoded else 0.0,
+            "avg_bytes": self.total_bytes / self.encoded if self.encoded else 0.0,
+        }
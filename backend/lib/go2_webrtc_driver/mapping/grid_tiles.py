@@ -0,0 +1,170 @@
+from collections import OrderedDict
+
+import numpy as np
+
+UNKNOWN = -1
+
+
+def parse_grid_map(data):
+    """
+    Occupancy grid, resolution and origin from a `rt/mapping/grid_map`
+    message's data (nav_msgs/OccupancyGrid layout: row-major int8 cells,
+    -1 unknown, 0-100 occupancy probability).
+    """
+    info = data["info"]
+    width, height = int(info["width"]), int(info["height"])
+    grid = np.asarray(data["data"], dtype=np.int8).reshape(height, width)
+    position = info.get("origin", {}).get("position", {})
+    origin = (float(position.get("x", 0.0)), float(position.get("y", 0.0)))
+    return grid, float(info["resolution"]), origin
+
+
+class GridMapTiles:
+    """
+    Keeps the robot's occupancy grid and serves it as square tiles.
+
+    Zoom level 0 is full resolution; each level above halves it, keeping
+    the most occupied value of every 2x2 block. update() compares the new
+    grid with the stored one and bumps the version of only the tiles that
+    changed, at every level, dropping their cached renderings. Tiles that
+    did not change keep their version, so clients can revalidate them by
+    ETag and cached renderings stay valid.
+    """
+
+    def __init__(self, tile_size=256, max_cached=1024):
+        self.tile_size = tile_size
+        self.max_cached = max_cached
+        self.grid = None
+        self.resolution = None
+        self.origin = None
+        self.epoch = 0
+        self.versions = []
+        self.cache = OrderedDict()
+
+        self.updates = 0
+        self.changed_tiles = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def levels(self):
+        if self.grid is None:
+            return 0
+        largest = max(self.grid.shape)
+        levels = 1
+        while (self.tile_size << (levels - 1)) < largest:
+            levels += 1
+        return levels
+
+    def tile_counts(self, level):
+        span = self.tile_size << level
+        height, width = self.grid.shape
+        return -(-height // span), -(-width // span)
+
+    def update(self, grid, resolution, origin):
+        """Store a new grid; returns the number of changed level-0 tiles."""
+        self.updates += 1
+        if (self.grid is None or grid.shape != self.grid.shape
+                or resolution != self.resolution or tuple(origin) != self.origin):
+            # Geometry changed: everything is new
+            self.grid = grid.copy()
+            self.resolution = resolution
+            self.origin = tuple(origin)
+            self.epoch += 1
+            self.versions = [np.zeros(self.tile_counts(level), dtype=np.uint32) for level in range(self.levels)]
+            self.cache.clear()
+            changed = self.versions[0].size
+            self.changed_tiles += changed
+            return changed
+
+        diff = grid != self.grid
+        if not diff.any():
+            return 0
+        np.copyto(self.grid, grid, where=diff)
+
+        rows, cols = self.tile_counts(0)
+        size = self.tile_size
+        padded = np.zeros((rows * size, cols * size), dtype=bool)
+        padded[:diff.shape[0], :diff.shape[1]] = diff
+        changed = padded.reshape(rows, size, cols, size).any(axis=(1, 3))
+        count = int(np.count_nonzero(changed))
+
+        for level, versions in enumerate(self.versions):
+            if level:
+                # A tile at this level covers 2x2 tiles of the level below
+                r, c = versions.shape
+                pad = np.zeros((r * 2, c * 2), dtype=bool)
+                pad[:changed.shape[0], :changed.shape[1]] = changed
+                changed = pad.reshape(r, 2, c, 2).any(axis=(1, 3))
+            versions[changed] += 1
+            for ty, tx in zip(*np.nonzero(changed)):
+                for fmt in ("png", "raw"):
+                    self.cache.pop((level, int(tx), int(ty), fmt), None)
+
+        self.changed_tiles += count
+        return count
+
+    def etag(self, level, tx, ty):
+        return f"{self.epoch}-{level}-{tx}-{ty}-{int(self.versions[level][ty, tx])}"
+
+    def tile_cells(self, level, tx, ty):
+        """
+        (tile_size, tile_size) int8 cells of a tile, UNKNOWN outside the map.
+        Raises IndexError for tiles outside the map.
+        """
+        if self.grid is None or not 0 <= level < self.levels:
+            raise IndexError("No such tile level")
+        rows, cols = self.tile_counts(level)
+        if not (0 <= tx < cols and 0 <= ty < rows):
+            raise IndexError("No such tile")
+
+        span = self.tile_size << level
+        block = self.grid[ty * span:(ty + 1) * span, tx * span:(tx + 1) * span]
+        tile = np.full((span, span), UNKNOWN, dtype=np.int8)
+        tile[:block.shape[0], :block.shape[1]] = block
+        if level:
+            factor = 1 << level
+            tile = tile.reshape(self.tile_size, factor, self.tile_size, factor).max(axis=(1, 3))
+        return tile
+
+    def get(self, level, tx, ty, fmt, render):
+        """
+        Return (etag, bytes) for a tile, rendering it with
+        `render(cells, fmt)` only if it is not cached.
+        """
+        key = (level, tx, ty, fmt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        tile = (self.etag(level, tx, ty), render(self.tile_cells(level, tx, ty), fmt))
+        self.cache[key] = tile
+        while len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+        return tile
+
+    def info(self):
+        if self.grid is None:
+            return None
+        height, width = self.grid.shape
+        return {
+            "width": width,
+            "height": height,
+            "resolution": self.resolution,
+            "origin": list(self.origin),
+            "tile_size": self.tile_size,
+            "levels": self.levels,
+            "epoch": self.epoch,
+        }
+
+    def stats(self):
+        return {
+            "updates": self.updates,
+            "changed_tiles": self.changed_tiles,
+            "cached_tiles": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
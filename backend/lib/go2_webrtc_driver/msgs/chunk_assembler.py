@@ -0,0 +1,88 @@
+class ChunkAssembler:
+    """
+    Reassembles a chunked response into one preallocated buffer.
+
+    Chunk indices run from 1 to `total_chunks` and may arrive in any order.
+    Every chunk but the last has the same size, so once that size is known
+    the buffer is allocated for all chunks and each chunk is copied
+    straight to its offset; result() trims the unused tail in place, so
+    the data is copied exactly once. A last chunk that arrives before any
+    other is held until the size is known. If chunks turn out not to be
+    of equal size, they are kept by index and joined at the end instead.
+    """
+
+    def __init__(self, total_chunks):
+        self.total_chunks = total_chunks
+        self.chunk_size = None
+        self.buffer = None
+        self.written = set()  # Indices copied into the buffer
+        self.slots = None     # Chunks by index, once sizes turned out unequal
+        self.held_last = None
+        self.length = 0
+        self.received = set()
+        self.received_bytes = 0
+
+    def __len__(self):
+        return self.received_bytes
+
+    @property
+    def complete(self):
+        return len(self.received) == self.total_chunks
+
+    def add(self, chunk_index, data):
+        """Store one chunk; returns True once every chunk has arrived."""
+        if not 1 <= chunk_index <= self.total_chunks:
+            raise ValueError(f"Chunk index {chunk_index} outside 1..{self.total_chunks}")
+        if chunk_index in self.received:
+            return self.complete  # Duplicate
+        self.received.add(chunk_index)
+        self.received_bytes += len(data)
+
+        last = chunk_index == self.total_chunks
+        if self.slots is None and self.chunk_size is None:
+            if last and self.total_chunks > 1:
+                # Its size says nothing about the others
+                self.held_last = data
+                return self.complete
+            self.chunk_size = len(data)
+            self.buffer = bytearray(self.chunk_size * self.total_chunks)
+
+        if self.slots is None and (len(data) > self.chunk_size or not last and len(data) != self.chunk_size):
+            self._fall_back()
+        if self.slots is not None:
+            self.slots[chunk_index - 1] = data
+        else:
+            self._write(chunk_index, data)
+            if self.held_last is not None:
+                data, self.held_last = self.held_last, None
+                self.received.discard(self.total_chunks)
+                self.received_bytes -= len(data)
+                return self.add(self.total_chunks, data)
+        return self.complete
+
+    def _write(self, chunk_index, data):
+        offset = (chunk_index - 1) * self.chunk_size
+        self.buffer[offset:offset + len(data)] = data
+        self.written.add(chunk_index)
+        if chunk_index == self.total_chunks:
+            self.length = offset + len(data)
+
+    def _fall_back(self):
+        self.slots = [None] * self.total_chunks
+        for index in self.written:
+            start = (index - 1) * self.chunk_size
+            end = self.length if index == self.total_chunks else start + self.chunk_size
+            self.slots[index - 1] = bytes(self.buffer[start:end])
+        if self.held_last is not None:
+            self.slots[-1], self.held_last = self.held_last, None
+        self.buffer = None
+
+    def result(self):
+        """The reassembled data as a bytearray; only valid once complete."""
+        if not self.complete:
+            raise ValueError("Chunks are missing")
+        if self.slots is not None:
+            return bytearray(b"".join(self.slots))
+        buffer, self.buffer = self.buffer, None
+        del buffer[self.length:]
+        return buffer
@@ -0,0 +1,131 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library is used without it
+    orjson = None
+
+# JSON backend for data channel messages: "orjson" or "json". Defaults to
+# orjson when it is installed; override with GO2_JSON_CODEC.
+BACKEND = os.environ.get("GO2_JSON_CODEC") or ("orjson" if orjson else "json")
+
+_loads = None
+_dumps = None
+
+
+def set_backend(name):
+    """Switch the JSON backend used by loads() and dumps()."""
+    global BACKEND, _loads, _dumps
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        _loads = orjson.loads
+
+        def _dumps(obj):
+            return orjson.dumps(obj).decode("utf-8")
+    elif name == "json":
+        def _loads(data):
+            # The standard library does not take memoryviews
+            return json.loads(data if isinstance(data, (str, bytes, bytearray)) else bytes(data))
+
+        _dumps = json.dumps
+    else:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    BACKEND = name
+
+
+def loads(data):
+    """Parse a str, bytes or memoryview JSON document.
+
+    Raises json.JSONDecodeError (orjson's error is a subclass of it).
+    """
+    return _loads(data)
+
+
+def dumps(obj):
+    """Serialize `obj` to a JSON str."""
+    return _dumps(obj)
+
+
+set_backend(BACKEND)
+
+
+class Slot:
+    """Placeholder for a field that MessageTemplate.render() fills in."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class MessageTemplate:
+    """
+    A message whose constant parts are serialized once.
+
+    `skeleton` is the message as a dict with Slot objects where values
+    change from message to message. render(**values) only serializes the
+    slot values and joins them with the pre-serialized parts, so the
+    envelope, topic and headers are not re-encoded for every message.
+    """
+
+    def __init__(self, skeleton):
+        markers = {}
+
+        def mark(value):
+            if isinstance(value, Slot):
+                marker = f"@@slot:{value.name}@@"
+                markers[marker] = value.name
+                return marker
+            if isinstance(value, dict):
+                return {key: mark(item) for key, item in value.items()}
+            return value
+
+        text = dumps(mark(skeleton))
+        self.parts = []
+        self.names = []
+        # Split the serialized skeleton at each quoted marker, in order of appearance
+        positions = sorted((text.index(f'"{marker}"'), marker) for marker in markers)
+        start = 0
+        for position, marker in positions:
+            self.parts.append(text[start:position])
+            self.names.append(markers[marker])
+            start = position + len(marker) + 2
+        self.parts.append(text[start:])
+
+    def render(self, **values):
+        pieces = [self.parts[0]]
+        for name, part in zip(self.names, self.parts[1:]):
+            value = values[name]
+            # Ids are plain ints; skip the encoder for them
+            pieces.append(str(value) if type(value) is int else dumps(value))
+            pieces.append(part)
+        return "".join(pieces)
+
+
+class TemplateCache:
+    """
+    Templates keyed by message shape, and fully rendered messages for
+    constant ones (subscribe requests, video/audio switches), which are
+    then sent without any serialization at all.
+    """
+
+    def __init__(self, max_constants=256):
+        self.templates = {}
+        self.constants = {}
+        self.max_constants = max_constants
+
+    def template(self, key, build):
+        """Return the template for `key`, building it with `build()` on first use."""
+        template = self.templates.get(key)
+        if template is None:
+            template = self.templates[key] = MessageTemplate(build())
+        return template
+
+    def constant(self, key, render):
+        """Return the rendered message for `key`, rendering it with `render()` on first use."""
+        message = self.constants.get(key)
+        if message is None:
+            if len(self.constants) >= self.max_constants:
+                self.constants.clear()
+            message = self.constants[key] = render()
+        return message
@@ -0,0 +1,139 @@
+import asyncio
+from ..constants import RTC_TOPIC, SPORT_CMD
+
+# (topic, api_id) pairs never coalesced, and they discard any coalesced
+# command still pending on their topic so it cannot be sent after them.
+# Keyed by topic too: api_ids of other services (audiohub) overlap these.
+STOP_COMMANDS = frozenset((
+    (RTC_TOPIC["SPORT_MOD"], SPORT_CMD["Damp"]),
+    (RTC_TOPIC["SPORT_MOD"], SPORT_CMD["StopMove"]),
+))
+
+
+class _Lane:
+    """Outbound state of one coalesced (topic, api_id)."""
+
+    def __init__(self):
+        self.pending = None  # (message, msg_type, uuid, futures) waiting for the next tick
+        self.tick = None     # Timer handle while a tick is running
+        self.submitted = 0
+        self.sent = 0
+        self.superseded = 0
+        self.discarded = 0
+
+
+class CommandCoalescer:
+    """
+    Latest-wins sending of continuous commands, such as Move while a
+    direction key is held.
+
+    The first command on an idle (topic, api_id) is sent at once and starts
+    a tick of `interval` seconds. Commands submitted during the tick replace
+    each other, and only the newest is sent when the tick ends. The caller
+    of a superseded command gets the response of the command that replaced
+    it. A command in STOP_COMMANDS is never coalesced, and it discards
+    pending commands on its topic (their callers get None); any other
+    command on the topic sends them first, so ordering is preserved.
+
+    `send(topic, message, msg_type, future, uuid)` does the actual sending.
+    Everything runs on the event loop thread.
+    """
+
+    def __init__(self, send, interval=0.05):
+        self.send = send
+        self.interval = interval
+        self.rules = {}  # Topic -> coalesced api_ids, or None for all
+        self.lanes = {}  # (topic, api_id) -> _Lane
+
+    def enable(self, topic, api_ids=None):
+        """Coalesce `api_ids` (or every api_id) on `topic`."""
+        self.rules[topic] = None if api_ids is None else set(api_ids)
+
+    def disable(self, topic):
+        self.before_send(topic, None)
+        self.rules.pop(topic, None)
+
+    def coalesces(self, topic, api_id):
+        if topic not in self.rules or (topic, api_id) in STOP_COMMANDS:
+            return False
+        api_ids = self.rules[topic]
+        return api_ids is None or api_id in api_ids
+
+    def submit(self, topic, api_id, message, msg_type, uuid):
+        """Queue a command for sending; returns the future of its response."""
+        future = asyncio.get_event_loop().create_future()
+        lane = self.lanes.setdefault((topic, api_id), _Lane())
+        lane.submitted += 1
+
+        if lane.tick is None:
+            self._send(topic, lane, (message, msg_type, uuid, [future]))
+            lane.tick = asyncio.get_event_loop().call_later(self.interval, self._end_tick, topic, lane)
+            return future
+
+        futures = [future]
+        if lane.pending:
+            lane.superseded += 1
+            futures = lane.pending[3] + futures
+        lane.pending = (message, msg_type, uuid, futures)
+        return future
+
+    def before_send(self, topic, api_id):
+        """
+        Called before an uncoalesced command on `topic` is sent: a stop
+        discards pending commands, anything else flushes them.
+        """
+        for (lane_topic, _), lane in self.lanes.items():
+            if lane_topic != topic or not lane.pending:
+                continue
+            if (topic, api_id) in STOP_COMMANDS:
+                for future in lane.pending[3]:
+                    if not future.done():
+                        future.set_result(None)
+                lane.discarded += 1
+            else:
+                self._send(topic, lane, lane.pending)
+            lane.pending = None
+            if lane.tick:
+                lane.tick.cancel()
+                lane.tick = None
+
+    def _send(self, topic, lane, entry):
+        message, msg_type, uuid, futures = entry
+        primary = futures[-1]
+        for future in futures[:-1]:
+            # Superseded callers share the response of the newest command
+            primary.add_done_callback(lambda done, future=future: _copy_result(done, future))
+        lane.sent += 1
+        self.send(topic, message, msg_type, primary, uuid)
+
+    def _end_tick(self, topic, lane):
+        lane.tick = None
+        if lane.pending:
+            entry, lane.pending = lane.pending, None
+            self._send(topic, lane, entry)
+            lane.tick = asyncio.get_event_loop().call_later(self.interval, self._end_tick, topic, lane)
+
+    def stats(self):
+        """Per-command submitted/sent/superseded/discarded counts"""
+        return [
+            {
+                "topic": topic,
+                "api_id": api_id,
+                "submitted": lane.submitted,
+                "sent": lane.sent,
+                "superseded": lane.superseded,
+                "discarded": lane.discarded,
+            }
+            for (topic, api_id), lane in list(self.lanes.items())
+        ]
+
+
+def _copy_result(source, target):
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
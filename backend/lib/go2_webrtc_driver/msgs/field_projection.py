@@ -0,0 +1,57 @@
+from operator import itemgetter
+
+_accessors = {}  # Path -> compiled accessor, shared by every projection
+
+
+def compile_path(path):
+    """
+    Compile a dotted field path such as "bms_state.soc" or "motor_state.0.q"
+    into a function returning that field of a message. Numeric segments
+    index lists. The function raises KeyError, IndexError or TypeError if
+    the field is missing. Accessors are cached by path.
+    """
+    accessor = _accessors.get(path)
+    if accessor is None:
+        keys = [int(key) if key.isdigit() else key for key in path.split(".")]
+        if len(keys) == 1:
+            accessor = itemgetter(keys[0])
+        elif len(keys) == 2:
+            first, second = keys
+            accessor = lambda message: message[first][second]
+        elif len(keys) == 3:
+            first, second, third = keys
+            accessor = lambda message: message[first][second][third]
+        else:
+            def accessor(message):
+                for key in keys:
+                    message = message[key]
+                return message
+        _accessors[path] = accessor
+    return accessor
+
+
+class FieldProjection:
+    """
+    Pulls the fields a subscriber needs out of a message into a small flat
+    dict keyed by path, e.g. {"bms_state.soc": 87, "imu_state.rpy": [...]}.
+    Paths are relative to message[root]; missing fields are None. Only the
+    projected values are kept, so the rest of the message can be freed as
+    soon as it has been dispatched.
+    """
+
+    def __init__(self, fields, root="data"):
+        if not fields:
+            raise ValueError("No fields to project")
+        self.fields = tuple(fields)
+        self.root = root
+        self.accessors = [(path, compile_path(path)) for path in self.fields]
+
+    def __call__(self, message):
+        payload = message.get(self.root) if self.root else message
+        record = {}
+        for path, accessor in self.accessors:
+            try:
+                record[path] = accessor(payload)
+            except (KeyError, IndexError, TypeError):
+                record[path] = None
+        return record
@@ -1,20 +1,72 @@
+import asyncio
 import logging
+import time
 from ..constants import DATA_CHANNEL_TYPE
 from ..util import get_nested_field
+from .chunk_assembler import ChunkAssembler
+from .timing_wheel import TimingWheel
+
+# Seconds to wait for a response; chunked responses get this long per chunk
+DEFAULT_TIMEOUT = 30.0
+# Seconds a partial chunked response may go without a new chunk
+CHUNK_TTL = 30.0
 
 class FutureResolver:
-    def __init__(self):
+    """
+    Matches responses to the futures of pending requests.
+
+    Every pending request has a deadline; once it passes, its futures fail
+    with asyncio.TimeoutError. Partially received chunked responses are
+    evicted after CHUNK_TTL seconds without a new chunk. Deadlines are kept
+    in a timing wheel swept every `sweep_interval` seconds on the event
+    loop, only while something is pending.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, chunk_ttl=CHUNK_TTL, sweep_interval=1.0):
         self.pending_responses = {}
         self.pending_callbacks = {}
         self.chunk_data_storage = {}
+        self.chunk_sinks = {}
+
+        self.timeout = timeout
+        self.chunk_ttl = chunk_ttl
+        self.timeouts = {}  # Timeout of each key with pending futures
+        self.wheel = TimingWheel(tick=sweep_interval)
+        self.sweep_handle = None
 
-    def save_resolve(self, message_type, topic, future, identifier):
+        self.chunk_bytes = 0
+        self.timed_out = 0
+        self.evicted_chunk_sets = 0
+
+    def save_resolve(self, message_type, topic, future, identifier, timeout=None):
+        """
+        Resolve `future` with the response to `identifier` (or the next
+        message of `message_type` on `topic`). It fails after `timeout`
+        seconds (default self.timeout; 0 waits forever).
+        """
         key = self.generate_message_key(message_type,topic,identifier)
         if key in self.pending_callbacks:
             self.pending_callbacks[key].append(future)
         else:
             self.pending_callbacks[key] = [future]
 
+        timeout = self.timeout if timeout is None else timeout
+        if timeout:
+            self.timeouts[key] = max(timeout, self.timeouts.get(key, 0))
+            self._extend(key)
+
+    def register_chunk_sink(self, identifier, sink):
+        """
+        Stream the file chunks of the response to `identifier` into
+        `sink(data_chunk, chunk_index, total_chunks)` instead of buffering
+        them. The sink returns True once it has every chunk, which resolves
+        the request with a message that carries no file data.
+        """
+        self.chunk_sinks[identifier] = sink
+
+    def remove_chunk_sink(self, identifier):
+        self.chunk_sinks.pop(identifier, None)
+
     def run_resolve_for_topic(self, message):
         if not message.get("type"):
             return
@@ -43,34 +95,12 @@ class FutureResolver:
                 raise ValueError("Chunk index is missing")
 
             data_chunk = message["data"].get("data")
-            if chunk_index < total_chunks:
-                if key in self.chunk_data_storage:
-                    self.chunk_data_storage[key].append(data_chunk)
-                else:
-                    self.chunk_data_storage[key] = [data_chunk]
+            if not self.store_chunk(key, chunk_index, total_chunks, data_chunk):
                 return
-            else:
-                self.chunk_data_storage[key].append(data_chunk)
-                message["data"]["data"] = self.merge_array_buffers(self.chunk_data_storage[key])
-                del self.chunk_data_storage[key]
+            message["data"]["data"] = self.pop_chunks(key).result()
 
         # Resolve the pending future with the final message
-        if key in self.pending_callbacks:
-            for future in self.pending_callbacks[key]:
-                if future:
-                    future.set_result(message)  # Resolve the future with the message
-            del self.pending_callbacks[key]
-
-    def merge_array_buffers(self, buffers):
-        total_length = sum(len(buf) for buf in buffers)
-        merged_buffer = bytearray(total_length)
-
-        current_position = 0
-        for buffer in buffers:
-            merged_buffer[current_position:current_position + len(buffer)] = buffer
-            current_position += len(buffer)
-
-        return bytes(merged_buffer)
+        self.resolve_pending(key, message)
 
     def run_resolve_for_topic_for_file(self, message):
         key = self.generate_message_key(
@@ -95,24 +125,134 @@ class FutureResolver:
             # Extract the chunk data
             data_chunk = file_info.get("data")
 
-            # Initialize the key in chunk_data_storage if it doesn't exist
-            if key not in self.chunk_data_storage:
-                self.chunk_data_storage[key] = []
+            sink = self.chunk_sinks.get(key)
+            if sink:
+                if not sink(data_chunk, chunk_index, total_chunks):
+                    # Still making progress: keep the request alive
+                    self._extend(key)
+                    return
+                del self.chunk_sinks[key]
+                message["info"]["file"]["data"] = None
+                self.resolve_pending(key, message)
+                return
 
-            # Append the chunk to the storage, ensuring it's in bytes
-            self.chunk_data_storage[key].append(data_chunk.encode('utf-8') if isinstance(data_chunk, str) else data_chunk)
+            # Store the chunk at its position, ensuring it's in bytes
+            data_chunk = data_chunk.encode('utf-8') if isinstance(data_chunk, str) else data_chunk
+            if not self.store_chunk(key, chunk_index, total_chunks, data_chunk):
+                return
 
-            # If this is the last chunk, combine all chunks and store the complete data
-            if chunk_index == total_chunks:
-                message["info"]["file"]["data"] = b''.join(self.chunk_data_storage[key])
-                del self.chunk_data_storage[key]  # Clean up the storage
+            # Every chunk is in: hand over the complete data
+            message["info"]["file"]["data"] = self.pop_chunks(key).result()
 
         # Resolve the pending future with the final message
+        self.resolve_pending(key, message)
+
+    def store_chunk(self, key, chunk_index, total_chunks, data_chunk):
+        """
+        Buffer one chunk of a chunked response at its position; returns True
+        once every chunk has arrived. The set expires if it stalls.
+        """
+        assembler = self.chunk_data_storage.get(key)
+        if assembler is None:
+            assembler = self.chunk_data_storage[key] = ChunkAssembler(total_chunks)
+        before = len(assembler)
+        complete = assembler.add(chunk_index, data_chunk)
+        self.chunk_bytes += len(assembler) - before
+
+        self.wheel.schedule(("chunks", key), time.monotonic() + self.chunk_ttl)
+        self._extend(key)
+        self._start_sweeping()
+        return complete
+
+    def pop_chunks(self, key):
+        """Remove and return the ChunkAssembler of `key`."""
+        assembler = self.chunk_data_storage.pop(key, None)
+        if assembler is None:
+            return None
+        self.chunk_bytes -= len(assembler)
+        self.wheel.cancel(("chunks", key))
+        return assembler
+
+    def resolve_pending(self, key, message):
         if key in self.pending_callbacks:
             for future in self.pending_callbacks[key]:
-                if future:
+                # Futures that already timed out or were cancelled are skipped
+                if future and not future.done():
                     future.set_result(message)  # Resolve the future with the message
             del self.pending_callbacks[key]
+            self.timeouts.pop(key, None)
+            self.wheel.cancel(("response", key))
+
+    def _extend(self, key):
+        """Move the deadline of `key`'s pending futures to its timeout from now."""
+        timeout = self.timeouts.get(key)
+        if timeout:
+            self.wheel.schedule(("response", key), time.monotonic() + timeout)
+            self._start_sweeping()
+
+    def _start_sweeping(self):
+        if self.sweep_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop; sweep() can still be called directly
+        self.sweep_handle = loop.call_later(self.wheel.tick, self._run_sweep)
+
+    def _run_sweep(self):
+        self.sweep_handle = None
+        self.sweep()
+        if len(self.wheel):
+            self._start_sweeping()
+
+    def sweep(self, now=None):
+        """Fail requests past their deadline and evict stalled chunk sets."""
+        for kind, key in self.wheel.expire(time.monotonic() if now is None else now):
+            if kind == "chunks":
+                dropped = self.chunk_bytes
+                self.pop_chunks(key)
+                self.evicted_chunk_sets += 1
+                logging.warning("Evicted stalled chunked response %s (%d bytes)", key, dropped - self.chunk_bytes)
+                continue
+
+            timeout = self.timeouts.pop(key, None)
+            for future in self.pending_callbacks.pop(key, []):
+                if future and not future.done():
+                    future.set_exception(asyncio.TimeoutError(f"No response to {key} within {timeout}s"))
+                    self.timed_out += 1
+            logging.warning("Request %s timed out after %ss", key, timeout)
+
+    def close(self):
+        """Stop sweeping and cancel everything still pending."""
+        if self.sweep_handle:
+            self.sweep_handle.cancel()
+            self.sweep_handle = None
+        for futures in self.pending_callbacks.values():
+            for future in futures:
+                if future and not future.done():
+                    future.cancel()
+        self.pending_callbacks.clear()
+        self.timeouts.clear()
+        self.chunk_data_storage.clear()
+        self.chunk_bytes = 0
+        self.wheel = TimingWheel(tick=self.wheel.tick)
+
+    def stats(self):
+        """Gauges of what is pending, and timeout/eviction counters"""
+        # Copied in one step: this may be called from another thread
+        pending = list(self.pending_callbacks.values())
+        return {
+            "pending_futures": sum(len(futures) for futures in pending),
+            "pending_requests": len(pending),
+            "buffered_chunk_sets": len(self.chunk_data_storage),
+            "buffered_chunk_bytes": self.chunk_bytes,
+            "timed_out": self.timed_out,
+            "evicted_chunk_sets": self.evicted_chunk_sets,
+        }
+
+    def is_pending(self, message_type, topic, identifier=None):
+        """True if a future waits for the message with this key."""
+        return self.generate_message_key(message_type, topic, identifier) in self.pending_callbacks
 
     def generate_message_key(self, message_type, topic, identifier):
         return identifier or f"{message_type} $ {topic}"
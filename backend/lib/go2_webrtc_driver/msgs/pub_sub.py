@@ -1,10 +1,17 @@
 import asyncio
-import json
 import time
-import random
-import logging
-from ..constants import DATA_CHANNEL_TYPE
+from collections import Counter
+from ..constants import DATA_CHANNEL_TYPE, RTC_TOPIC
+from . import codec
+from .codec import Slot, TemplateCache
+from .command_coalescer import CommandCoalescer
+from .rate_meter import RateMeter
+from .read_cache import ReadRequestCache
+from .request_mux import RequestMultiplexer
+from .send_scheduler import BULK, CONTROL, SendScheduler, classify
 from .future_resolver import FutureResolver
+from .topic_matcher import TopicMatcher, is_pattern, pattern_matches
+from .topic_subscriber import TopicSubscriber, DROP_OLDEST
 from ..util import get_nested_field
 
 class WebRTCDataChannelPubSub:
@@ -13,130 +20,326 @@ class WebRTCDataChannelPubSub:
         self.channel = channel
 
         self.future_resolver = FutureResolver()
-        self.subscriptions = {}  # Dictionary to hold callbacks keyed by topic
+        self.subscriptions = {}  # Lists of TopicSubscriber keyed by topic or pattern
+        self.matcher = TopicMatcher()
+        self.topic_refs = Counter()  # Subscriptions that need each robot topic
+        self.templates = TemplateCache()
+        self.coalescer = CommandCoalescer(self.send_encoded)
+        self.requests = RequestMultiplexer()
+        self.read_cache = ReadRequestCache()
+        self.scheduler = SendScheduler(channel)
+        self.rates = {}  # Topic -> (arrived, delivered) RateMeters
     
     def run_resolve(self, message):
         self.future_resolver.run_resolve_for_topic(message)
 
          # Extract the topic from the message
         topic = message.get("topic")
-        if topic in self.subscriptions:
-            # Call the registered callback with the message
-            callback = self.subscriptions[topic]
-            callback(message)
-        
+        if topic:
+            now = time.monotonic()
+            arrived, delivered = self._rates(topic)
+            arrived.tick(now)
+            # Hand the message to each matching subscriber's queue; callbacks run from their own tasks
+            accepted = False
+            for subscriber in self.matcher.match(topic):
+                accepted = subscriber.put(message, now) or accepted
+            if accepted:
+                delivered.tick(now)
 
-    async def publish(self, topic, data=None, msg_type=None):
-        channel = self.channel
-        future = asyncio.get_event_loop().create_future()
+    def admit(self, topic, msg_type=DATA_CHANNEL_TYPE["MSG"]):
+        """
+        Early check for an incoming message on `topic`, before it is fully
+        parsed. False if the topic has subscribers, every one of them would
+        decimate the message (see subscribe's max_hz) and no request waits
+        for it; the message then counts as arrived and decimated.
+        """
+        subscribers = self.matcher.match(topic)
+        if not subscribers:
+            return True
+        now = time.monotonic()
+        for subscriber in subscribers:
+            if subscriber.due(now):
+                return True
+        if self.future_resolver.is_pending(msg_type, topic):
+            return True
+        for subscriber in subscribers:
+            subscriber.received += 1
+            subscriber.decimated += 1
+        self._rates(topic)[0].tick(now)
+        return False
 
-        if channel.readyState == "open":
-            message_dict = {
-                "type": msg_type or DATA_CHANNEL_TYPE["MSG"],
-                "topic": topic
+    def _rates(self, topic):
+        rates = self.rates.get(topic)
+        if rates is None:
+            rates = self.rates[topic] = (RateMeter(), RateMeter())
+        return rates
+
+    def rate_stats(self):
+        """Messages arrived and delivered to at least one subscriber, per topic"""
+        now = time.monotonic()
+        return {
+            topic: {
+                "arrived": arrived.count,
+                "delivered": delivered.count,
+                "arrived_hz": arrived.hz(now),
+                "delivered_hz": delivered.hz(now),
             }
-            # Only include "data" if it's not None
-            if data is not None:
-                message_dict["data"] = data
-            
-            # Convert the dictionary to a JSON string
-            message = json.dumps(message_dict)
-
-            channel.send(message)
-
-            # Log the message being published
-            logging.info(f"> message sent: {message}")
-
-            # Store the future so it can be completed when the response is received
-            uuid = (
-                get_nested_field(data, "uuid") or
-                get_nested_field(data, "header", "identity", "id") or 
-                get_nested_field(data, "req_uuid")
-            )
+            for topic, (arrived, delivered) in list(self.rates.items())
+        }
 
-            self.future_resolver.save_resolve(msg_type or DATA_CHANNEL_TYPE["MSG"], topic, future, uuid)
-        else:
-            future.set_exception(Exception("Data channel is not open"))
+    def encode_message(self, topic, data=None, msg_type=None):
+        """Serialize a data channel message, reusing cached templates."""
+        msg_type = msg_type or DATA_CHANNEL_TYPE["MSG"]
+        if data is None or isinstance(data, str):
+            # Constant messages (subscriptions, switches) are only serialized once
+            def render():
+                message_dict = {"type": msg_type, "topic": topic}
+                # Only include "data" if it's not None
+                if data is not None:
+                    message_dict["data"] = data
+                return codec.dumps(message_dict)
+
+            return self.templates.constant((msg_type, topic, data), render)
 
+        template = self.templates.template(
+            (msg_type, topic),
+            lambda: {"type": msg_type, "topic": topic, "data": Slot("data")},
+        )
+        return template.render(data=data)
+
+    async def publish(self, topic, data=None, msg_type=None, timeout=None):
+        # Store the future so it can be completed when the response is received
+        uuid = (
+            get_nested_field(data, "uuid") or
+            get_nested_field(data, "header", "identity", "id") or 
+            get_nested_field(data, "req_uuid")
+        )
+        message = self.encode_message(topic, data, msg_type)
+        return await self.publish_encoded(topic, message, msg_type, uuid, timeout, classify(topic, msg_type, data=data))
+
+    async def publish_encoded(self, topic, message, msg_type=None, uuid=None, timeout=None, priority=None):
+        """
+        Send an already serialized message and wait for its response.
+        Raises asyncio.TimeoutError if none arrives within `timeout`
+        seconds (default FutureResolver.timeout).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.send_encoded(topic, message, msg_type, future, uuid, timeout, priority)
         return await future
+
+    def send_encoded(self, topic, message, msg_type, future, uuid, timeout=None, priority=None):
+        """
+        Send a serialized message through the scheduler; `future` is
+        completed by its response. `priority` defaults to the class
+        classify() gives the topic and message type.
+        """
+        channel = self.channel
+
+        if channel.readyState == "open":
+            if priority is None:
+                priority = classify(topic, msg_type)
+            self.future_resolver.save_resolve(msg_type or DATA_CHANNEL_TYPE["MSG"], topic, future, uuid, timeout)
+            self.scheduler.send(message, priority, future)
+        else:
+            future.set_exception(Exception("Data channel is not open"))
     
 
     def publish_without_callback(self, topic, data=None, msg_type=None):
 
         if self.channel.readyState == "open":
-            message_dict = {
-                "type": msg_type or DATA_CHANNEL_TYPE["MSG"],
-                "topic": topic
-            }
-
-            # Only include "data" if it's not None
-            if data is not None:
-                message_dict["data"] = data
-            
-            # Convert the dictionary to a JSON string
-            message = json.dumps(message_dict)
-                
-            self.channel.send(message)
-
-            # Log the message being published
-            logging.info(f"> message sent: {message}")
+            message = self.encode_message(topic, data, msg_type)
+            self.scheduler.send(message, classify(topic, msg_type, data=data))
         else:
             Exception("Data channel is not open")
         
 
     async def publish_request_new(self, topic, options=None):
-        # Generate a unique identifier
-        generated_id = int(time.time() * 1000) % 2147483648 + random.randint(0, 1000)
-        
         # Check if api_id is provided
         if not (options and "api_id" in options):
             print("Error: Please provide app id")
             return asyncio.Future().set_exception(Exception("Please provide app id"))
 
-        # Build the request header and parameter
-        request_payload = {
-            "header": {
-                "identity": {
-                    "id": options.get("id", generated_id),
-                    "api_id": options.get("api_id", 0)
-                }
-            },
-            "parameter": ""
-        }
+        api_id = options["api_id"]
+        if self.read_cache.is_read(topic, api_id) and "id" not in options:
+            # Identical reads share one round trip and a short-lived response
+            parameter = options.get("parameter", "")
+            if not isinstance(parameter, str):
+                parameter = codec.dumps(parameter)
+            return await self.read_cache.get(
+                topic, api_id, parameter,
+                lambda: self.requests.request(topic, options, self._publish_request),
+            )
+        self.read_cache.invalidate(topic, api_id)
 
-        # Add data to parameter
-        if options and "parameter" in options:
-            request_payload["parameter"] = options["parameter"] if isinstance(options["parameter"], str) else json.dumps(options["parameter"])
+        # The multiplexer assigns a unique id, applies the topic's in-flight window and times the call
+        return await self.requests.request(topic, options, self._publish_request)
 
-        # Add priority if specified
-        if options and "priority" in options:
-            request_payload["header"]["policy"] = {
-                "priority": 1
-            }
+    async def _publish_request(self, topic, options):
+        request_id = options["id"]
+        api_id = options["api_id"]
+        message = self.encode_request(topic, request_id, options)
+
+        if self.coalescer.coalesces(topic, api_id):
+            # Latest wins: may be superseded by a newer command before it is sent
+            return await self.coalescer.submit(topic, api_id, message, DATA_CHANNEL_TYPE["REQUEST"], request_id)
+        self.coalescer.before_send(topic, api_id)
+
+        # Requests flagged "priority" jump the queues like control commands
+        priority = CONTROL if "priority" in options else classify(topic, api_id=api_id)
 
         # Publish the request
-        return await self.publish(topic, request_payload, DATA_CHANNEL_TYPE["REQUEST"])
+        return await self.publish_encoded(topic, message, DATA_CHANNEL_TYPE["REQUEST"], request_id, priority=priority)
+
+    def enable_coalescing(self, topic, api_ids=None, interval=None):
+        """
+        Send only the newest pending request per send tick for `api_ids`
+        (or every api_id) on `topic`. See CommandCoalescer; stop commands
+        are never coalesced.
+        """
+        if interval is not None:
+            self.coalescer.interval = interval
+        self.coalescer.enable(topic, api_ids)
+
+    def disable_coalescing(self, topic):
+        self.coalescer.disable(topic)
+
+    def set_request_window(self, topic, size):
+        """Limit the requests in flight on `topic` to `size` (None for no limit)."""
+        self.requests.set_window(topic, size)
+
+    def request_stats(self):
+        """In-flight requests per topic and round-trip latency percentiles per topic and api_id"""
+        return self.requests.stats()
+
+    def read_cache_stats(self):
+        """Hits, misses and shared in-flight reads of the read-only request cache"""
+        return self.read_cache.stats()
+
+    def scheduler_stats(self):
+        """Queue depth, sent counts and queueing delay per priority class"""
+        return self.scheduler.stats()
+
+    async def writable(self, priority=BULK):
+        """
+        Wait until the channel can take another message of `priority`
+        without queueing it; bulk senders call this between chunks.
+        """
+        await self.scheduler.writable(priority)
+
+    def coalescing_stats(self):
+        """Submitted, sent, superseded and discarded counts per coalesced command"""
+        return self.coalescer.stats()
+
+    def encode_request(self, topic, request_id, options):
+        """Serialize a request; only the id, api_id and parameter are encoded per call."""
+        parameter = options.get("parameter", "")
+        if not isinstance(parameter, str):
+            parameter = codec.dumps(parameter)
+        priority = "priority" in options
+
+        def build():
+            # Build the request header and parameter
+            request_payload = {
+                "header": {
+                    "identity": {
+                        "id": Slot("id"),
+                        "api_id": Slot("api_id")
+                    }
+                },
+                "parameter": Slot("parameter")
+            }
+            # Add priority if specified
+            if priority:
+                request_payload["header"]["policy"] = {
+                    "priority": 1
+                }
+            return {"type": DATA_CHANNEL_TYPE["REQUEST"], "topic": topic, "data": request_payload}
+
+        template = self.templates.template(("request", topic, priority), build)
+        return template.render(id=request_id, api_id=options.get("api_id", 0), parameter=parameter)
     
-    def subscribe(self, topic, callback=None):
+    @staticmethod
+    def robot_topics(topic):
+        """
+        Robot topics a subscription needs. The robot only understands plain
+        topics, so a pattern is expanded against the known RTC_TOPIC values.
+        """
+        if not is_pattern(topic):
+            return [topic]
+        return sorted({name for name in RTC_TOPIC.values() if pattern_matches(topic, name)})
+
+    def subscribe(self, topic, callback=None, max_queue=16, policy=DROP_OLDEST, max_hz=None, fields=None):
+        """
+        Subscribe to `topic`, which may also be a pattern: "*" matches one
+        path segment and a trailing "/" or "/**" matches everything below,
+        e.g. "rt/uslam/" or "rt/utlidar/*". Every subscriber gets its own
+        bounded queue (see TopicSubscriber for the drop policies). Messages
+        go to `callback` if given; otherwise iterate the returned subscriber
+        with `async for`. `max_hz` limits the rate of messages this
+        subscriber gets; the rest are dropped as early as possible, before
+        parsing where the topic can be read from the raw message. With
+        `fields`, e.g. ["bms_state.soc", "imu_state.rpy"], the subscriber
+        gets a flat dict of just those paths of the message's "data"
+        instead of the whole message. Returns the TopicSubscriber, or None
+        if the channel is not open.
+        """
         channel = self.channel
 
         if not channel or channel.readyState != "open":
             print("Error: Data channel is not open")
             return
         
-        # Register the callback for the topic
-        if callback:
-            self.subscriptions[topic] = callback
+        subscriber = TopicSubscriber(topic, callback, max_queue, policy, max_hz, fields)
+        self.matcher.add(topic, subscriber)
+        self.subscriptions.setdefault(topic, []).append(subscriber)
 
-        self.publish_without_callback(topic=topic, msg_type=DATA_CHANNEL_TYPE["SUBSCRIBE"])
+        # The robot only needs to be asked once per topic
+        for name in self.robot_topics(topic):
+            self.topic_refs[name] += 1
+            if self.topic_refs[name] == 1:
+                self.publish_without_callback(topic=name, msg_type=DATA_CHANNEL_TYPE["SUBSCRIBE"])
+        return subscriber
 
-    def unsubscribe(self, topic):
+    def unsubscribe(self, topic, subscriber=None):
+        """
+        Remove `subscriber` from `topic` (the topic or pattern it was
+        subscribed with), or every subscriber if none is given; the robot
+        is told to stop sending a topic once nothing needs it.
+        """
         channel = self.channel
 
+        subscribers = self.subscriptions.get(topic, [])
+        removed = 0
+        for sub in list(subscribers):
+            if subscriber is None or sub is subscriber:
+                sub.close()
+                subscribers.remove(sub)
+                self.matcher.remove(topic, sub)
+                removed += 1
+        if not subscribers:
+            self.subscriptions.pop(topic, None)
+
+        unused = []
+        for name in self.robot_topics(topic):
+            self.topic_refs[name] -= min(removed, self.topic_refs[name])
+            if not self.topic_refs[name]:
+                del self.topic_refs[name]
+                unused.append(name)
+        if not unused:
+            return
+
         if not channel or channel.readyState != "open":
             print("Error: Data channel is not open")
             return
 
-        self.publish_without_callback(topic=topic, msg_type=DATA_CHANNEL_TYPE["UNSUBSCRIBE"])
+        for name in unused:
+            self.publish_without_callback(topic=name, msg_type=DATA_CHANNEL_TYPE["UNSUBSCRIBE"])
+
+    def subscription_stats(self):
+        """Per-subscriber queue depth, lag and drop counters, keyed by topic"""
+        return {
+            topic: [subscriber.stats() for subscriber in subscribers]
+            for topic, subscribers in list(self.subscriptions.items())
+        }
 
     
\ No newline at end of file
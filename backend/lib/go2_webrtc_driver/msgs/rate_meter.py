@@ -0,0 +1,32 @@
+class RateMeter:
+    """
+    Message count and rate. The rate is measured over consecutive windows
+    of `window` seconds and reported for the last complete one, or for
+    the current one once it has run longer than a window.
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.count = 0
+        self.window_start = None
+        self.window_count = 0
+        self.rate = 0.0
+
+    def tick(self, now):
+        self.count += 1
+        if self.window_start is None:
+            self.window_start = now
+        elif now - self.window_start >= self.window:
+            self.rate = self.window_count / (now - self.window_start)
+            self.window_start = now
+            self.window_count = 0
+        self.window_count += 1
+
+    def hz(self, now):
+        if self.window_start is None:
+            return 0.0
+        elapsed = now - self.window_start
+        if elapsed >= self.window:
+            # Messages stopped or slowed down; don't report a stale rate
+            return self.window_count / elapsed
+        return self.rate
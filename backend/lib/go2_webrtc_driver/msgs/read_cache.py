@@ -0,0 +1,99 @@
+import asyncio
+import time
+from ..constants import AUDIO_API, RTC_TOPIC, SPORT_CMD
+from ..util import get_nested_field
+
+ANY_COMMAND = None
+
+# Read-only requests whose responses can be shared, mapped to the api_ids
+# that change what they return. ANY_COMMAND: every other request on the
+# topic does.
+READ_REQUESTS = {
+    (RTC_TOPIC["SPORT_MOD"], SPORT_CMD["GetBodyHeight"]): (SPORT_CMD["BodyHeight"],),
+    (RTC_TOPIC["SPORT_MOD"], SPORT_CMD["GetFootRaiseHeight"]): (SPORT_CMD["FootRaiseHeight"],),
+    (RTC_TOPIC["SPORT_MOD"], SPORT_CMD["GetSpeedLevel"]): (SPORT_CMD["SpeedLevel"],),
+    (RTC_TOPIC["SPORT_MOD"], SPORT_CMD["GetState"]): ANY_COMMAND,
+    (RTC_TOPIC["AUDIO_HUB_REQ"], AUDIO_API["GET_AUDIO_LIST"]): (
+        AUDIO_API["UPLOAD_AUDIO_FILE"], AUDIO_API["SELECT_RENAME"], AUDIO_API["SELECT_DELETE"],
+    ),
+    (RTC_TOPIC["AUDIO_HUB_REQ"], AUDIO_API["GET_PLAY_MODE"]): (AUDIO_API["SET_PLAY_MODE"],),
+}
+
+
+class ReadRequestCache:
+    """
+    Single-flight deduplication and a short TTL cache for read-only requests.
+
+    Concurrent identical reads (same topic, api_id and parameter) share one
+    request to the robot, and a successful response is reused for `ttl`
+    seconds. Sending a setter listed in READ_REQUESTS drops the cached
+    responses it affects, and a read already in flight when the setter is
+    sent is not cached. Responses are shared between callers and must not
+    be modified.
+    """
+
+    def __init__(self, ttl=1.0, reads=READ_REQUESTS):
+        self.ttl = ttl
+        self.reads = reads
+        self.entries = {}    # key -> (expires, response)
+        self.in_flight = {}  # key -> task
+        self.generations = {}  # (topic, api_id) -> invalidation count
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.invalidations = 0
+
+    def is_read(self, topic, api_id):
+        return (topic, api_id) in self.reads
+
+    async def get(self, topic, api_id, parameter, fetch):
+        """Return the response of the read, calling `fetch()` only if needed."""
+        key = (topic, api_id, parameter)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.misses += 1
+            task = self.in_flight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+        # Shielded: a caller giving up doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, fetch):
+        generation = self.generations.get(key[:2], 0)
+        try:
+            response = await fetch()
+        finally:
+            self.in_flight.pop(key, None)
+        status = get_nested_field(response, "data", "header", "status", "code")
+        if status in (None, 0) and self.generations.get(key[:2], 0) == generation:
+            self.entries[key] = (time.monotonic() + self.ttl, response)
+        return response
+
+    def invalidate(self, topic, api_id):
+        """Drop the cached reads that a request of `api_id` on `topic` changes."""
+        for (read_topic, read_api_id), setters in self.reads.items():
+            if read_topic != topic or read_api_id == api_id:
+                continue
+            if setters is ANY_COMMAND and not self.is_read(topic, api_id) or setters and api_id in setters:
+                self.generations[(topic, read_api_id)] = self.generations.get((topic, read_api_id), 0) + 1
+                for key in [key for key in self.entries if key[:2] == (topic, read_api_id)]:
+                    del self.entries[key]
+                self.invalidations += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "invalidations": self.invalidations,
+            "cached": len(self.entries),
+            "in_flight": len(self.in_flight),
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import math
+import random
+import time
+from .command_coalescer import STOP_COMMANDS
+
+# Request ids are sent as 31-bit positive ints
+MAX_REQUEST_ID = 2147483647
+
+
+class LatencyHistogram:
+    """
+    Round-trip times in log-spaced buckets, each `growth` times wider than
+    the one before, starting at `min_ms`. Memory is constant however many
+    samples are recorded; percentiles are accurate to one bucket (5% with
+    the default growth).
+    """
+
+    def __init__(self, min_ms=0.1, growth=1.05, buckets=320):
+        self.min_ms = min_ms
+        self.log_growth = math.log(growth)
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def record(self, ms):
+        index = 0 if ms <= self.min_ms else int(math.log(ms / self.min_ms) / self.log_growth) + 1
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the `q`-th percentile, in ms."""
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * q / 100)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.min_ms * math.exp(index * self.log_growth), self.max_ms)
+        return self.max_ms
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class RequestMultiplexer:
+    """
+    Issues WebRTCDataChannelPubSub requests with unique ids, an
+    optional in-flight window per topic, and round-trip latency per
+    (topic, api_id).
+
+    Ids come from a counter that starts at a random offset and wraps below
+    MAX_REQUEST_ID, so concurrent requests never share an id (and so never
+    share a FutureResolver key) unless 2**31 are in flight. With a window
+    set for a topic, requests beyond it wait for an earlier one to finish;
+    stop commands never wait. Latency is measured from the moment a request
+    is sent (after any wait for the window) to its response.
+    """
+
+    def __init__(self):
+        self.ids = itertools.count(random.randint(1, MAX_REQUEST_ID))
+        self.windows = {}  # Topic -> asyncio.Semaphore
+        self.in_flight = {}  # Topic -> count
+        self.latency = {}  # (topic, api_id) -> LatencyHistogram
+
+    def next_id(self):
+        return next(self.ids) % MAX_REQUEST_ID + 1
+
+    def set_window(self, topic, size):
+        """Allow at most `size` requests in flight on `topic`; None for no limit."""
+        if size is None:
+            self.windows.pop(topic, None)
+        else:
+            self.windows[topic] = asyncio.Semaphore(size)
+
+    async def request(self, topic, options, send):
+        """
+        Assign `options` an id if it has none, then run `send(topic, options)`
+        within the topic's window, recording its latency under the topic
+        and api_id.
+        """
+        if "id" not in options:
+            options = dict(options, id=self.next_id())
+        api_id = options["api_id"]
+        window = self.windows.get(topic)
+        if window is not None and (topic, api_id) not in STOP_COMMANDS:
+            async with window:
+                return await self._timed(topic, api_id, send(topic, options))
+        return await self._timed(topic, api_id, send(topic, options))
+
+    async def _timed(self, topic, api_id, pending):
+        histogram = self.latency.get((topic, api_id))
+        if histogram is None:
+            histogram = self.latency[(topic, api_id)] = LatencyHistogram()
+        self.in_flight[topic] = self.in_flight.get(topic, 0) + 1
+        start = time.perf_counter()
+        try:
+            response = await pending
+        except Exception:
+            histogram.errors += 1
+            raise
+        finally:
+            self.in_flight[topic] -= 1
+        histogram.record((time.perf_counter() - start) * 1e3)
+        return response
+
+    def stats(self):
+        return {
+            "in_flight": dict(self.in_flight),
+            # Keyed "<topic>:<api_id>", e.g. "rt/api/sport/request:1001"
+            "latency": {
+                f"{topic}:{api_id}": histogram.stats()
+                for (topic, api_id), histogram in list(self.latency.items())
+            },
+        }
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import base64
+import os
 from ..constants import DATA_CHANNEL_TYPE, WebRTCConnectionMethod
 from ..util import generate_uuid
 
@@ -87,7 +88,8 @@ class WebRTCDataChannelFileUploader:
     
     def __init__(self, channel, pub_sub):
         self.channel = channel
-        self.publish = pub_sub.publish
+        self.publish = pub_sub.publish_without_callback
+        self.writable = pub_sub.writable
         self.cancel_upload = False
     
     def slice_base64_into_chunks(self, data, chunk_size):
@@ -112,8 +114,8 @@ class WebRTCDataChannelFileUploader:
                 print("Upload canceled.")
                 return "cancel"
             
-            if i % 5 == 0:
-                await asyncio.sleep(0.5)
+            # Paced by the channel's send buffer; control messages still go first
+            await self.writable()
             
             uuid = generate_uuid()
             req_uuid = f"upload_req_{uuid}"
@@ -145,13 +147,67 @@ class WebRTCDataChannelFileUploader:
         self.cancel_upload = True
 
 
+class Base64ChunkFileWriter:
+    """
+    Decodes base64 file chunks as they arrive and writes them to a file.
+
+    Chunks may arrive out of order; early ones are held until the gap is
+    filled. Base64 quanta split across chunks are carried over, so only
+    the undecoded tail of one chunk is ever buffered.
+    """
+
+    def __init__(self, file, progress_callback=None):
+        self.file = file
+        self.progress_callback = progress_callback
+        self.next_index = 1
+        self.pending = {}
+        self.carry = b""
+        self.bytes_written = 0
+        self.error = None
+        self.cancelled = False
+
+    def write_chunk(self, data_chunk, chunk_index, total_chunks):
+        """FutureResolver chunk sink; returns True when the file is complete."""
+        if self.cancelled:
+            return True
+        try:
+            if isinstance(data_chunk, str):
+                data_chunk = data_chunk.encode('ascii')
+            self.pending[chunk_index] = data_chunk or b""
+            while self.next_index in self.pending:
+                self._decode(self.pending.pop(self.next_index))
+                if self.progress_callback:
+                    self.progress_callback(int(self.next_index / total_chunks * 100))
+                self.next_index += 1
+
+            if self.next_index > total_chunks:
+                self._decode(b"", final=True)
+                return True
+            return False
+        except Exception as e:
+            # Resolve the request so the download reports the failure
+            self.error = e
+            return True
+
+    def _decode(self, data, final=False):
+        data = self.carry + data
+        end = len(data) if final else len(data) - len(data) % 4
+        self.carry = data[end:]
+        if end:
+            decoded = base64.b64decode(data[:end])
+            self.file.write(decoded)
+            self.bytes_written += len(decoded)
+
+
 class WebRTCDataChannelFileDownloader:
     
     def __init__(self, channel, pub_sub):
         self.channel = channel
         self.publish = pub_sub.publish
+        self.future_resolver = pub_sub.future_resolver
         self.cancel_download = False
         self.chunk_data_storage = {}
+        self.writer = None
 
     async def download_file(self, file_path, chunk_size=60*1024, progress_callback=None):
         """Downloads a file in chunks with the possibility to cancel the download."""
@@ -195,9 +251,63 @@ class WebRTCDataChannelFileDownloader:
             logging.error("Failed to download file:", e)
             return "error"
 
-def cancel(self):
-    """Cancel the ongoing download."""
-    self.cancel_download = True
+    async def download_file_to_path(self, file_path, dest_path, progress_callback=None):
+        """
+        Downloads a file straight to `dest_path`, decoding each chunk as it
+        arrives instead of holding the whole file in memory. The file is
+        written next to `dest_path` and renamed into place once complete.
+        Returns `dest_path`, "cancel" or "error".
+        """
+        self.cancel_download = False
+        req_uuid = f"req_{generate_uuid()}"
+        tmp_path = f"{dest_path}.part"
+
+        try:
+            with open(tmp_path, "wb") as f:
+                writer = self.writer = Base64ChunkFileWriter(f, progress_callback)
+                self.future_resolver.register_chunk_sink(req_uuid, writer.write_chunk)
+
+                request_message = {
+                    "req_type": "request_static_file",
+                    "req_uuid": req_uuid,
+                    "related_bussiness": "uslam_final_pcd",
+                    "file_md5": "null",
+                    "file_path": file_path
+                }
+                response = await self.publish("", request_message, DATA_CHANNEL_TYPE["RTC_INNER_REQ"])
+
+                # A small file may come back in one unchunked response
+                data = response.get("info", {}).get("file", {}).get("data")
+                if data:
+                    writer.write_chunk(data, 1, 1)
+
+            if self.cancel_download:
+                logging.info("Download canceled.")
+                os.remove(tmp_path)
+                return "cancel"
+            if writer.error:
+                raise writer.error
+
+            os.replace(tmp_path, dest_path)
+            if progress_callback:
+                progress_callback(100)
+            return dest_path
+
+        except Exception as e:
+            logging.error(f"Failed to download file: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return "error"
+        finally:
+            self.future_resolver.remove_chunk_sink(req_uuid)
+            self.writer = None
+
+    def cancel(self):
+        """Cancel the ongoing download."""
+        self.cancel_download = True
+        if self.writer:
+            # Stops writing; the request resolves on the next chunk
+            self.writer.cancelled = True
 
 class WebRTCDataChannelRTCInnerReq:
     def __init__(self, conn, channel, pub_sub):
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from ..constants import AUDIO_API, DATA_CHANNEL_TYPE, RTC_TOPIC
+from .command_coalescer import STOP_COMMANDS
+from .request_mux import LatencyHistogram
+
+# Priority classes, highest first
+CONTROL, TELEMETRY, BULK = 0, 1, 2
+PRIORITY_NAMES = ("control", "telemetry", "bulk")
+
+# Everything sent on these topics moves the robot
+CONTROL_TOPICS = frozenset((RTC_TOPIC["SPORT_MOD"], RTC_TOPIC["WIRELESS_CONTROLLER"]))
+
+# Requests carrying file contents
+BULK_REQUESTS = frozenset((
+    (RTC_TOPIC["AUDIO_HUB_REQ"], AUDIO_API["UPLOAD_AUDIO_FILE"]),
+    (RTC_TOPIC["AUDIO_HUB_REQ"], AUDIO_API["UPLOAD_MEGAPHONE"]),
+))
+BULK_INNER_REQUESTS = frozenset(("push_static_file",))
+
+
+def classify(topic, msg_type=None, api_id=None, data=None):
+    """Priority class of an outbound message."""
+    if msg_type == DATA_CHANNEL_TYPE["HEARTBEAT"] or topic in CONTROL_TOPICS or (topic, api_id) in STOP_COMMANDS:
+        return CONTROL
+    if (topic, api_id) in BULK_REQUESTS:
+        return BULK
+    if msg_type == DATA_CHANNEL_TYPE["RTC_INNER_REQ"] and isinstance(data, dict) \
+            and data.get("req_type") in BULK_INNER_REQUESTS:
+        return BULK
+    return TELEMETRY
+
+
+class SendScheduler:
+    """
+    Sends data channel messages in priority order, paced by the channel's
+    bufferedAmount.
+
+    A message is sent straight away while no message of its class or a
+    higher one is queued and bufferedAmount is below `high_water`;
+    otherwise it waits in its class's queue. Queues are drained, highest
+    class first, whenever the channel reports "bufferedamountlow" (the
+    buffer fell to `low_threshold`). Control messages are never queued, so
+    at most `high_water` bytes of other traffic are ahead of a stop
+    command. Bulk senders await writable() before producing the next chunk
+    instead of sleeping a fixed time.
+    """
+
+    def __init__(self, channel, high_water=256 * 1024, low_threshold=64 * 1024, poll_interval=1.0):
+        self.channel = channel
+        self.high_water = high_water
+        self.low_threshold = low_threshold
+        self.poll_interval = poll_interval
+        self.queues = [deque() for _ in PRIORITY_NAMES]  # (message, enqueued, future)
+        self.waiters = []  # (priority, future) waiting for writable()
+
+        self.sent = [0] * len(PRIORITY_NAMES)
+        self.dropped = [0] * len(PRIORITY_NAMES)
+        self.max_queued = [0] * len(PRIORITY_NAMES)
+        self.wait = [LatencyHistogram() for _ in PRIORITY_NAMES]
+
+        if channel is not None and hasattr(channel, "on"):
+            channel.bufferedAmountLowThreshold = low_threshold
+            channel.on("bufferedamountlow", self.drain)
+
+    def buffered_amount(self):
+        return getattr(self.channel, "bufferedAmount", 0)
+
+    def send(self, message, priority=TELEMETRY, future=None):
+        """
+        Send `message` now or queue it. `future`, if given, fails should
+        the channel close before the message is sent.
+        """
+        if priority == CONTROL or (
+            not any(self.queues[:priority + 1]) and self.buffered_amount() < self.high_water
+        ):
+            self._send(message, priority, time.perf_counter())
+            return
+        queue = self.queues[priority]
+        queue.append((message, time.perf_counter(), future))
+        self.max_queued[priority] = max(self.max_queued[priority], len(queue))
+
+    def _send(self, message, priority, enqueued):
+        self.channel.send(message)
+        self.sent[priority] += 1
+        self.wait[priority].record((time.perf_counter() - enqueued) * 1e3)
+
+        # Log the message being published
+        logging.info("> message sent: %s", message)
+
+    def drain(self):
+        """Send queued messages, highest class first, until the buffer is full again."""
+        if self.channel.readyState != "open":
+            self._drop_queued()
+        else:
+            for priority, queue in enumerate(self.queues):
+                while queue and self.buffered_amount() < self.high_water:
+                    message, enqueued, _ = queue.popleft()
+                    self._send(message, priority, enqueued)
+                if queue:
+                    break
+
+        waiting, self.waiters = self.waiters, []
+        for priority, future in waiting:
+            if future.done():
+                continue
+            if self.is_writable(priority):
+                future.set_result(None)
+            else:
+                self.waiters.append((priority, future))
+
+    def _drop_queued(self):
+        for priority, queue in enumerate(self.queues):
+            while queue:
+                _, _, future = queue.popleft()
+                self.dropped[priority] += 1
+                if future is not None and not future.done():
+                    future.set_exception(Exception("Data channel is not open"))
+
+    def is_writable(self, priority=BULK):
+        """True if a message of `priority` would be sent without queueing."""
+        if self.channel.readyState != "open":
+            return True  # Nothing to wait for; the send itself reports the closed channel
+        return not any(self.queues[:priority + 1]) and self.buffered_amount() < self.high_water
+
+    async def writable(self, priority=BULK):
+        """
+        Wait until a message of `priority` can be sent without queueing.
+        The buffer is also checked every `poll_interval` seconds in case a
+        "bufferedamountlow" event is missed.
+        """
+        while not self.is_writable(priority):
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.append((priority, future))
+            await asyncio.wait([future], timeout=self.poll_interval)
+            if not future.done():
+                future.cancel()
+                self.drain()
+
+    def stats(self):
+        return {
+            "buffered_amount": self.buffered_amount(),
+            "high_water": self.high_water,
+            "classes": {
+                name: {
+                    "queued": len(self.queues[priority]),
+                    "max_queued": self.max_queued[priority],
+                    "sent": self.sent[priority],
+                    "dropped": self.dropped[priority],
+                    "wait": self.wait[priority].stats(),
+                }
+                for priority, name in enumerate(PRIORITY_NAMES)
+            },
+        }
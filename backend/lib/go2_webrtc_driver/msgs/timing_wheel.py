@@ -0,0 +1,65 @@
+class TimingWheel:
+    """
+    Hashed timing wheel of deadlines.
+
+    A key lives in the slot of the tick its deadline falls in, so schedule()
+    and cancel() are O(1), and expire() only looks at the slots of the
+    ticks that passed since the last call instead of at every key. A key
+    whose deadline is more than one revolution away stays in its slot and
+    is simply skipped until its deadline comes.
+    """
+
+    def __init__(self, tick=1.0, slots=64):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # key -> deadline
+        self.where = {}  # key -> slot index
+        self.last_tick = None  # Tick of the last expire()
+        self.first_tick = None  # Earliest tick scheduled before the first expire()
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, key):
+        return key in self.where
+
+    def schedule(self, key, deadline):
+        """Set (or move) the deadline of `key`."""
+        self.cancel(key)
+        tick = int(deadline // self.tick)
+        if self.last_tick is None:
+            # The first expire() starts from the earliest tick scheduled
+            self.first_tick = tick if self.first_tick is None else min(self.first_tick, tick)
+        else:
+            # Deadlines already past go in the slot expire() looks at next
+            tick = max(tick, self.last_tick)
+        index = tick % len(self.slots)
+        self.slots[index][key] = deadline
+        self.where[key] = index
+
+    def cancel(self, key):
+        index = self.where.pop(key, None)
+        if index is not None:
+            del self.slots[index][key]
+
+    def expire(self, now):
+        """Remove and return the keys whose deadline is at or before `now`."""
+        current = int(now // self.tick)
+        if self.last_tick is not None:
+            first = self.last_tick
+        elif self.first_tick is not None:
+            first = min(self.first_tick, current)
+        else:
+            first = current
+        # A full revolution visits every slot; no need to go round again
+        first = max(first, current - len(self.slots) + 1)
+        self.last_tick = current
+
+        expired = []
+        for tick in range(first, current + 1):
+            slot = self.slots[tick % len(self.slots)]
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self.where[key]
+                    expired.append(key)
+        return expired
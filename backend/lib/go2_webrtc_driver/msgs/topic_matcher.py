@@ -0,0 +1,135 @@
+SEPARATOR = "/"
+ANY_SEGMENT = "*"
+ANY_SUFFIX = "**"
+
+
+def is_pattern(pattern):
+    """True if `pattern` is a prefix or wildcard pattern rather than a plain topic."""
+    segments = pattern.split(SEPARATOR)
+    return pattern.endswith(SEPARATOR) or ANY_SEGMENT in segments or ANY_SUFFIX in segments
+
+
+def pattern_segments(pattern):
+    """
+    Split a pattern into segments. A trailing "/" is shorthand for "/**",
+    so "rt/uslam/" matches every topic under rt/uslam.
+    """
+    if pattern.endswith(SEPARATOR):
+        pattern += ANY_SUFFIX
+    segments = pattern.split(SEPARATOR)
+    if ANY_SUFFIX in segments[:-1]:
+        raise ValueError(f"'{ANY_SUFFIX}' is only allowed as the last segment: {pattern}")
+    return segments
+
+
+class _Node:
+    __slots__ = ("children", "values", "suffix_values")
+
+    def __init__(self):
+        self.children = {}
+        self.values = []         # Patterns ending at this node
+        self.suffix_values = []  # Patterns ending in "**" below this node
+
+
+class TopicMatcher:
+    """
+    Maps topic patterns to values and finds the values matching a topic.
+
+    Patterns are "/"-separated. A "*" segment matches exactly one segment
+    and a final "**" (or a trailing "/") matches any remainder, including
+    none. Patterns are stored in a trie of segments, so matching walks the
+    topic once, whatever the number of patterns. Results are cached per
+    topic until the patterns change, which makes dispatch for a topic that
+    was seen before a single dict lookup.
+    """
+
+    def __init__(self, max_cached=1024):
+        self.root = _Node()
+        self.max_cached = max_cached
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, pattern, value):
+        node = self.root
+        segments = pattern_segments(pattern)
+        for segment in segments[:-1]:
+            node = node.children.setdefault(segment, _Node())
+        if segments[-1] == ANY_SUFFIX:
+            node.suffix_values.append(value)
+        else:
+            node.children.setdefault(segments[-1], _Node()).values.append(value)
+        self.cache.clear()
+
+    def remove(self, pattern, value):
+        """Remove one registration of `value` under `pattern`; returns False if absent."""
+        path = [self.root]
+        segments = pattern_segments(pattern)
+        for segment in segments[:-1]:
+            child = path[-1].children.get(segment)
+            if child is None:
+                return False
+            path.append(child)
+
+        if segments[-1] == ANY_SUFFIX:
+            values = path[-1].suffix_values
+        else:
+            child = path[-1].children.get(segments[-1])
+            if child is None:
+                return False
+            path.append(child)
+            values = child.values
+        if value not in values:
+            return False
+        values.remove(value)
+        self.cache.clear()
+
+        # Prune nodes that no longer lead anywhere
+        walked = segments if segments[-1] != ANY_SUFFIX else segments[:-1]
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.children or node.values or node.suffix_values:
+                break
+            del path[depth - 1].children[walked[depth - 1]]
+        return True
+
+    def match(self, topic):
+        """Tuple of the values whose patterns match `topic`."""
+        matched = self.cache.get(topic)
+        if matched is not None:
+            self.hits += 1
+            return matched
+
+        self.misses += 1
+        found = []
+        nodes = [self.root]
+        for segment in topic.split(SEPARATOR):
+            following = []
+            for node in nodes:
+                found.extend(node.suffix_values)
+                for key in (segment, ANY_SEGMENT):
+                    child = node.children.get(key)
+                    if child is not None:
+                        following.append(child)
+            nodes = following
+            if not nodes:
+                break
+        for node in nodes:
+            found.extend(node.values)
+            found.extend(node.suffix_values)
+
+        matched = tuple(found)
+        if len(self.cache) >= self.max_cached:
+            self.cache.clear()
+        self.cache[topic] = matched
+        return matched
+
+    def stats(self):
+        return {"cached_topics": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+
+def pattern_matches(pattern, topic):
+    """Match a single pattern against a topic."""
+    matcher = TopicMatcher()
+    matcher.add(pattern, pattern)
+    return bool(matcher.match(topic))
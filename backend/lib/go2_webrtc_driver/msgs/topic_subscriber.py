@@ -0,0 +1,153 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from .field_projection import FieldProjection
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+LATEST_ONLY = "latest_only"
+
+
+class TopicSubscriber:
+    """
+    One subscriber to a data channel topic, with its own bounded queue.
+
+    The pub/sub dispatcher only enqueues, so a slow subscriber never holds
+    up other topics or control traffic. When the queue is full, `policy`
+    drops the oldest queued message or the incoming one; LATEST_ONLY keeps
+    just the newest message. Messages are consumed either by `callback`
+    (a function or coroutine function, run from a task of its own) or by
+    iterating the subscriber with `async for`.
+
+    With `max_hz` set, messages arriving sooner than 1 / max_hz seconds
+    after the last accepted one are decimated (discarded before they are
+    queued). Accepted messages stay on a fixed grid while the topic keeps
+    up, so the delivered rate is max_hz rather than somewhat below it.
+
+    With `fields` (dotted paths below the message's "data", see
+    FieldProjection), accepted messages are reduced to a flat dict of just
+    those fields before they are queued.
+    """
+
+    def __init__(self, topic, callback=None, max_queue=16, policy=DROP_OLDEST, max_hz=None, fields=None):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, LATEST_ONLY):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        if max_hz is not None and max_hz <= 0:
+            raise ValueError("max_hz must be positive")
+
+        self.topic = topic
+        self.callback = callback
+        self.policy = policy
+        self.max_queue = 1 if policy == LATEST_ONLY else max_queue
+        self.queue = deque()
+        self.ready = asyncio.Event()
+        self.task = None
+        self.closed = False
+        self.max_hz = max_hz
+        self.interval = 1.0 / max_hz if max_hz else 0.0
+        self.next_due = 0.0
+        self.projection = FieldProjection(fields) if fields else None
+
+        self.received = 0
+        self.decimated = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def due(self, now):
+        """True if a message arriving at `now` would not be decimated."""
+        return now >= self.next_due
+
+    def put(self, message, now=None):
+        """
+        Queue a message without blocking; called by the dispatcher. Returns
+        False if it was decimated.
+        """
+        if self.closed:
+            return False
+        if now is None:
+            now = time.monotonic()
+        self.received += 1
+        if self.interval:
+            if now < self.next_due:
+                self.decimated += 1
+                return False
+            late = now - self.next_due
+            self.next_due = (self.next_due if late < self.interval else now) + self.interval
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return True
+            self.queue.popleft()
+        if self.projection:
+            message = self.projection(message)
+        self.queue.append((now, message))
+        self.ready.set()
+
+        if self.callback and self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run_callback())
+        return True
+
+    def _take(self):
+        queued_at, message = self.queue.popleft()
+        if not self.queue:
+            self.ready.clear()
+        self.last_lag = time.monotonic() - queued_at
+        self.max_lag = max(self.max_lag, self.last_lag)
+        self.delivered += 1
+        return message
+
+    async def get(self):
+        """Wait for and return the next message; raises StopAsyncIteration once closed."""
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            await self.ready.wait()
+        return self._take()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    async def _run_callback(self):
+        while True:
+            try:
+                message = await self.get()
+            except StopAsyncIteration:
+                return
+            try:
+                result = self.callback(message)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logging.error("Error in subscriber callback for %s", self.topic, exc_info=True)
+
+    def close(self):
+        """Stop the subscriber; pending iteration ends once the queue is drained."""
+        self.closed = True
+        self.ready.set()
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self):
+        return {
+            "topic": self.topic,
+            "policy": self.policy,
+            "queue_depth": len(self.queue),
+            "max_hz": self.max_hz,
+            "fields": list(self.projection.fields) if self.projection else None,
+            "received": self.received,
+            "decimated": self.decimated,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
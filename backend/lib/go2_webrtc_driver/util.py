@@ -1,10 +1,10 @@
 import hashlib
 import json
 import logging
-import random
 import requests
 import time
 import sys
+import uuid
 from Crypto.PublicKey import RSA
 from .unitree_auth import make_remote_request
 from .encryption import rsa_encrypt, rsa_load_public_key, aes_decrypt, generate_aes_key
@@ -16,15 +16,8 @@ def _generate_md5(string: str) -> str:
     return md5_hash.hexdigest()
 
 def generate_uuid():
-    def replace_char(char):
-        rand = random.randint(0, 15)
-        if char == "x":
-            return format(rand, 'x')
-        elif char == "y":
-            return format((rand & 0x3) | 0x8, 'x')
-
-    uuid_template = "xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx"
-    return ''.join(replace_char(char) if char in 'xy' else char for char in uuid_template)
+    # Random (version 4) UUID, e.g. "3f2c6a1e-8d4b-4c1f-9a7e-0b5d2e6f8a90"
+    return str(uuid.uuid4())
 
 
 def get_nested_field(message, *fields):
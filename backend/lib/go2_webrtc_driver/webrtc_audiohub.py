@@ -176,8 +176,8 @@ class WebRTCAudioHub:
                     }
                 )
                 
-                # Wait a small amount between chunks
-                await asyncio.sleep(0.1)
+                # Let the send buffer drain before the next chunk
+                await self.data_channel.pub_sub.writable()
                 
             self.logger.info("All chunks sent")
             return response
@@ -257,8 +257,8 @@ class WebRTCAudioHub:
                     }
                 )
                 
-                # Wait a small amount between chunks
-                await asyncio.sleep(0.1)
+                # Let the send buffer drain before the next chunk
+                await self.data_channel.pub_sub.writable()
                 
             self.logger.info("All chunks sent")
             return response
@@ -1,25 +1,55 @@
 import asyncio
 import json
 import logging
+import re
 import struct
 import sys
+from .msgs import codec
 from .msgs.pub_sub import WebRTCDataChannelPubSub
-from .lidar.lidar_decoder import LidarDecoder
 from .msgs.heartbeat import WebRTCDataChannelHeartBeat
 from .msgs.validation import WebRTCDataChannelValidaton
 from .msgs.rtc_inner_req import WebRTCDataChannelRTCInnerReq
+from .lidar.decode_executor import LidarDecodeExecutor, DROP_OLDEST
+from .lidar.lazy_frame import LazyLidarData
+from .lidar.decode_cache import LidarDecodeCache
+from .lidar.recording import LidarRecorder
 from .util import print_status
 from .msgs.error_handler import handle_error
 
 from .constants import DATA_CHANNEL_TYPE
 
-decoder = LidarDecoder()
+_decoder = None
+_decode_cache = None
+
+# Topic of a telemetry message as the robot serializes it, read without parsing the rest
+_MSG_TOPIC = re.compile(r'\{\s*"type"\s*:\s*"msg"\s*,\s*"topic"\s*:\s*"([^"\\]+)"')
+
+def get_decoder():
+    """Return the shared LidarDecoder, creating it on first use."""
+    global _decoder
+    if _decoder is None:
+        # Imported here so wasmtime is only loaded once lidar data arrives
+        from .lidar.lidar_decoder import LidarDecoder
+        _decoder = LidarDecoder()
+    return _decoder
+
+def get_decode_cache():
+    """Return the LidarDecodeCache wrapping the shared decoder."""
+    global _decode_cache
+    if _decode_cache is None:
+        _decode_cache = LidarDecodeCache(get_decoder())
+    return _decode_cache
+
+def decode_voxels(compressed_data, data):
+    return get_decode_cache().decode(compressed_data, data)
 
 class WebRTCDataChannel:
     def __init__(self, conn, pc) -> None:
         self.channel = pc.createDataChannel("data")
         self.data_channel_opened = False
         self.conn = conn
+        self.lidar_executor = None
+        self.lidar_recorder = None
 
         self.pub_sub = WebRTCDataChannelPubSub(self.channel)
 
@@ -55,6 +85,10 @@ class WebRTCDataChannel:
             self.data_channel_opened = False
             self.heartbeat.stop_heartbeat()
             self.rtc_inner_req.network_status.stop_network_status_fetch()
+            if self.lidar_executor:
+                self.lidar_executor.shutdown()
+                self.lidar_executor = None
+            self.stop_lidar_recording()
             
         # Event handler for data channel messages
         @self.channel.on("message")
@@ -68,15 +102,25 @@ class WebRTCDataChannel:
 
                 # Determine how to parse the 'data' field
                 if isinstance(message, str):
-                    parsed_data = json.loads(message)
+                    # Messages every rate-limited subscriber would drop are not parsed
+                    topic = WebRTCDataChannel.peek_topic(message)
+                    if topic and not self.pub_sub.admit(topic):
+                        return
+                    parsed_data = codec.loads(message)
                 elif isinstance(message, bytes):
-                    parsed_data = WebRTCDataChannel.deal_array_buffer(message)
+                    if self.lidar_recorder:
+                        self.lidar_recorder.write(message)
+                    parsed_data, binary_data = WebRTCDataChannel.split_array_buffer(message)
+                    topic = parsed_data.get("topic")
+                    if topic and not self.pub_sub.admit(topic, parsed_data.get("type", DATA_CHANNEL_TYPE["MSG"])):
+                        return
+                    if self.lidar_executor:
+                        # Decoded off the loop; dispatched once the frame is ready
+                        self.lidar_executor.submit(parsed_data, binary_data)
+                        return
+                    parsed_data = WebRTCDataChannel.decode_payload(parsed_data, binary_data)
                 
-                # Resolve any pending futures or callbacks associated with this message
-                self.pub_sub.run_resolve(parsed_data)
-
-                # Handle the response
-                await self.handle_response(parsed_data)
+                await self.dispatch_message(parsed_data)
         
             except json.JSONDecodeError:
                 logging.error("Failed to decode JSON message: %s", message, exc_info=True)
@@ -84,6 +128,40 @@ class WebRTCDataChannel:
                 logging.error("Error processing WebRTC data", exc_info=True)
 
 
+    async def dispatch_message(self, parsed_data: dict):
+        # Resolve any pending futures or callbacks associated with this message
+        self.pub_sub.run_resolve(parsed_data)
+
+        # Handle the response
+        await self.handle_response(parsed_data)
+
+    def enable_lidar_decode_executor(self, workers=2, max_queue=4, drop_policy=DROP_OLDEST):
+        """
+        Decode binary lidar frames in a pool of worker processes instead of
+        inline on the event loop. Frames are still dispatched in order.
+        """
+        if self.lidar_executor:
+            self.lidar_executor.shutdown()
+        self.lidar_executor = LidarDecodeExecutor(self.dispatch_message, workers, max_queue, drop_policy)
+
+    def disable_lidar_decode_executor(self):
+        if self.lidar_executor:
+            self.lidar_executor.shutdown()
+            self.lidar_executor = None
+
+    def start_lidar_recording(self, path):
+        """
+        Append every binary (lidar) message received to the recording at
+        `path`; replay it with lidar.recording.LidarRecording.
+        """
+        self.stop_lidar_recording()
+        self.lidar_recorder = LidarRecorder(path)
+
+    def stop_lidar_recording(self):
+        if self.lidar_recorder:
+            self.lidar_recorder.close()
+            self.lidar_recorder = None
+
     async def handle_response(self, msg: dict):
         msg_type = msg["type"]
 
@@ -112,37 +190,57 @@ class WebRTCDataChannel:
         while not self.data_channel_opened:
             await asyncio.sleep(0.1)
     
+    @staticmethod
+    def peek_topic(message):
+        """Topic of a "msg" type message string, or None if it can't be read cheaply."""
+        match = _MSG_TOPIC.match(message)
+        return match.group(1) if match else None
+
     @staticmethod
     def deal_array_buffer(buffer):
+        decoded_json, binary_data = WebRTCDataChannel.split_array_buffer(buffer)
+        return WebRTCDataChannel.decode_payload(decoded_json, binary_data)
+    @staticmethod
+    def deal_array_buffer_for_normal(buffer):
+        decoded_json, binary_data = WebRTCDataChannel.split_array_buffer_for_normal(buffer)
+        return WebRTCDataChannel.decode_payload(decoded_json, binary_data)
+    @staticmethod
+    def deal_array_buffer_for_lidar(buffer):
+        decoded_json, binary_data = WebRTCDataChannel.split_array_buffer_for_lidar(buffer)
+        return WebRTCDataChannel.decode_payload(decoded_json, binary_data)
+    @staticmethod
+    def decode_payload(decoded_json, binary_data):
+        # Decoded when a subscriber first reads decoded_json['data']['data']
+        decoded_json['data'] = LazyLidarData(decoded_json['data'], binary_data, decode_voxels)
+        return decoded_json
+
+    @staticmethod
+    def split_array_buffer(buffer):
+        """
+        Split a binary message into its parsed JSON header and binary payload.
+
+        The payload is returned as a memoryview into `buffer`, not a copy.
+        """
+        buffer = memoryview(buffer)
         header_1, header_2 = struct.unpack_from('<HH', buffer, 0)
         if header_1 == 2 and header_2 == 0:
-            return WebRTCDataChannel.deal_array_buffer_for_lidar(buffer[4:])
+            return WebRTCDataChannel.split_array_buffer_for_lidar(buffer[4:])
         else:
-            return WebRTCDataChannel.deal_array_buffer_for_normal(buffer)
+            return WebRTCDataChannel.split_array_buffer_for_normal(buffer)
     @staticmethod
-    def deal_array_buffer_for_normal(buffer):
+    def split_array_buffer_for_normal(buffer):
         header_length, = struct.unpack_from('<H', buffer, 0)
         json_data = buffer[4:4 + header_length]
         binary_data = buffer[4 + header_length:]
 
-        decoded_json = json.loads(json_data.decode('utf-8'))
-
-        decoded_data = decoder.decode(binary_data, decoded_json['data'])
-
-        decoded_json['data']['data'] = decoded_data
-        return decoded_json
+        return codec.loads(json_data), binary_data
     @staticmethod
-    def deal_array_buffer_for_lidar(buffer):
+    def split_array_buffer_for_lidar(buffer):
         header_length, = struct.unpack_from('<I', buffer, 0)
         json_data = buffer[8:8 + header_length]
         binary_data = buffer[8 + header_length:]
 
-        decoded_json = json.loads(json_data.decode('utf-8'))
-
-        decoded_data = decoder.decode(binary_data, decoded_json['data'])
-
-        decoded_json['data']['data'] = decoded_data
-        return decoded_json
+        return codec.loads(json_data), binary_data
 
     
     #Should turn it on when subscribed to ulidar topic
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+from lib.go2_webrtc_driver.msgs.future_resolver import FutureResolver
+
+
+def test_shorter_timeout_saved_after_longer_one_fires_first():
+    async def run():
+        resolver = FutureResolver(timeout=30.0)
+        loop = asyncio.get_running_loop()
+        slow, fast = loop.create_future(), loop.create_future()
+        resolver.save_resolve("req", "topic", slow, "slow")
+        resolver.save_resolve("req", "topic", fast, "fast", timeout=5.0)
+
+        start = time.monotonic()
+        resolver.sweep(start + 6.0)
+        assert isinstance(fast.exception(), asyncio.TimeoutError)
+        assert not slow.done()
+
+        resolver.sweep(start + 31.0)
+        assert isinstance(slow.exception(), asyncio.TimeoutError)
+        assert resolver.stats()["timed_out"] == 2
+        resolver.close()
+
+    asyncio.run(run())
+
+
+def test_response_cancels_timeout():
+    async def run():
+        resolver = FutureResolver(timeout=5.0)
+        future = asyncio.get_running_loop().create_future()
+        resolver.save_resolve("req", "topic", future, "id")
+        message = {"type": "res", "topic": "topic", "data": {"header": {"identity": {"id": "id"}}}}
+        resolver.run_resolve_for_topic(message)
+        assert future.result() is message
+
+        resolver.sweep(time.monotonic() + 10.0)
+        assert resolver.stats()["timed_out"] == 0
+        resolver.close()
+
+    asyncio.run(run())
@@ -0,0 +1,169 @@
+import asyncio
+
+from lib.go2_webrtc_driver.constants import AUDIO_API, RTC_TOPIC, SPORT_CMD
+from lib.go2_webrtc_driver.msgs.read_cache import ReadRequestCache
+
+SPORT = RTC_TOPIC["SPORT_MOD"]
+AUDIO = RTC_TOPIC["AUDIO_HUB_REQ"]
+GET_HEIGHT = SPORT_CMD["GetBodyHeight"]
+
+
+def response(value, code=0):
+    return {"data": {"header": {"status": {"code": code}}, "data": value}}
+
+
+class Robot:
+    """A fetch factory whose responses are released by the test."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+
+    def fetch(self, value, code=0):
+        async def fetch():
+            self.calls += 1
+            self.release = asyncio.get_running_loop().create_future()
+            await self.release
+            return response(value, code)
+        return fetch
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_reads_share_one_request():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        tasks = [asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(i))) for i in range(5)]
+        await settle()
+        robot.release.set_result(None)
+        results = await asyncio.gather(*tasks)
+        assert robot.calls == 1
+        assert all(result is results[0] for result in results)
+        assert cache.stats()["misses"] == 1 and cache.stats()["shared"] == 4
+
+        # Cached for the TTL
+        assert await cache.get(SPORT, GET_HEIGHT, "", robot.fetch(9)) is results[0]
+        assert robot.calls == 1 and cache.stats()["hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_different_parameters_are_separate_reads():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        first = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "a", robot.fetch(1)))
+        await settle()
+        robot.release.set_result(None)
+        second = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "b", robot.fetch(2)))
+        await settle()
+        robot.release.set_result(None)
+        assert (await first)["data"]["data"] == 1
+        assert (await second)["data"]["data"] == 2
+        assert robot.calls == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_read():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        leaving = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(1)))
+        staying = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(2)))
+        await settle()
+        leaving.cancel()
+        await settle()
+        robot.release.set_result(None)
+        assert (await staying)["data"]["data"] == 1
+
+    asyncio.run(run())
+
+
+def test_expired_entry_is_fetched_again():
+    async def run():
+        cache = ReadRequestCache(ttl=0)
+        robot = Robot()
+        for value in (1, 2):
+            task = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(value)))
+            await settle()
+            robot.release.set_result(None)
+            assert (await task)["data"]["data"] == value
+        assert robot.calls == 2
+
+    asyncio.run(run())
+
+
+def test_error_responses_are_not_cached():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        task = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(1, code=3104)))
+        await settle()
+        robot.release.set_result(None)
+        await task
+        assert cache.stats()["cached"] == 0
+
+    asyncio.run(run())
+
+
+def test_setter_invalidates_its_reads_only():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        for api_id in (GET_HEIGHT, SPORT_CMD["GetSpeedLevel"]):
+            task = asyncio.ensure_future(cache.get(SPORT, api_id, "", robot.fetch(api_id)))
+            await settle()
+            robot.release.set_result(None)
+            await task
+        assert cache.stats()["cached"] == 2
+
+        cache.invalidate(SPORT, SPORT_CMD["BodyHeight"])
+        assert (SPORT, GET_HEIGHT, "") not in cache.entries
+        assert (SPORT, SPORT_CMD["GetSpeedLevel"], "") in cache.entries
+
+        # GetState is invalidated by every other sport command, but not by reads
+        cache.invalidate(SPORT, SPORT_CMD["GetSpeedLevel"])
+        assert (SPORT, SPORT_CMD["GetSpeedLevel"], "") in cache.entries
+
+    asyncio.run(run())
+
+
+def test_same_api_id_on_another_topic_does_not_invalidate():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        task = asyncio.ensure_future(cache.get(AUDIO, AUDIO_API["GET_AUDIO_LIST"], "", robot.fetch(1)))
+        await settle()
+        robot.release.set_result(None)
+        await task
+        cache.invalidate(SPORT, AUDIO_API["UPLOAD_AUDIO_FILE"])
+        assert cache.stats()["cached"] == 1
+        cache.invalidate(AUDIO, AUDIO_API["UPLOAD_AUDIO_FILE"])
+        assert cache.stats()["cached"] == 0
+
+    asyncio.run(run())
+
+
+def test_read_in_flight_during_setter_is_not_cached():
+    async def run():
+        cache = ReadRequestCache()
+        robot = Robot()
+        task = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(1)))
+        await settle()
+        cache.invalidate(SPORT, SPORT_CMD["BodyHeight"])
+        robot.release.set_result(None)
+        assert (await task)["data"]["data"] == 1
+        assert cache.stats()["cached"] == 0
+
+        # The next read goes to the robot
+        task = asyncio.ensure_future(cache.get(SPORT, GET_HEIGHT, "", robot.fetch(2)))
+        await settle()
+        robot.release.set_result(None)
+        assert (await task)["data"]["data"] == 2
+
+    asyncio.run(run())
@@ -0,0 +1,155 @@
+import asyncio
+
+from lib.go2_webrtc_driver.constants import AUDIO_API, RTC_TOPIC, SPORT_CMD
+from lib.go2_webrtc_driver.msgs.command_coalescer import CommandCoalescer
+from lib.go2_webrtc_driver.msgs.request_mux import MAX_REQUEST_ID, RequestMultiplexer
+
+SPORT = RTC_TOPIC["SPORT_MOD"]
+AUDIO = RTC_TOPIC["AUDIO_HUB_REQ"]
+
+
+class Peer:
+    """A send() whose responses are released by the test."""
+
+    def __init__(self):
+        self.sent = []
+        self.pending = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, topic, options):
+        self.sent.append((topic, options))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        future = self.pending[options["id"]] = asyncio.get_running_loop().create_future()
+        try:
+            return await future
+        finally:
+            self.in_flight -= 1
+
+    def respond_all(self):
+        for request_id, future in list(self.pending.items()):
+            if not future.done():
+                future.set_result({"id": request_id})
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_requests_get_unique_ids():
+    async def run():
+        mux = RequestMultiplexer()
+        peer = Peer()
+        tasks = [asyncio.ensure_future(mux.request(SPORT, {"api_id": 1002}, peer.send)) for _ in range(100)]
+        await settle()
+        peer.respond_all()
+        responses = await asyncio.gather(*tasks)
+        ids = [options["id"] for _, options in peer.sent]
+        assert len(set(ids)) == 100
+        assert all(1 <= request_id <= MAX_REQUEST_ID for request_id in ids)
+        assert [response["id"] for response in responses] == ids
+
+    asyncio.run(run())
+
+
+def test_ids_wrap_below_max():
+    mux = RequestMultiplexer()
+    mux.ids = iter([MAX_REQUEST_ID - 1, MAX_REQUEST_ID, MAX_REQUEST_ID + 1])
+    assert [mux.next_id() for _ in range(3)] == [MAX_REQUEST_ID, 1, 2]
+
+
+def test_given_id_is_kept():
+    async def run():
+        mux = RequestMultiplexer()
+        peer = Peer()
+        task = asyncio.ensure_future(mux.request(SPORT, {"api_id": 1002, "id": 42}, peer.send))
+        await settle()
+        peer.respond_all()
+        assert await task == {"id": 42}
+
+    asyncio.run(run())
+
+
+def test_window_limits_in_flight_requests():
+    async def run():
+        mux = RequestMultiplexer()
+        mux.set_window(AUDIO, 2)
+        peer = Peer()
+        tasks = [
+            asyncio.ensure_future(mux.request(AUDIO, {"api_id": AUDIO_API["SELECT_START_PLAY"]}, peer.send))
+            for _ in range(5)
+        ]
+        while not all(task.done() for task in tasks):
+            await settle()
+            assert peer.in_flight <= 2
+            peer.respond_all()
+        assert peer.max_in_flight == 2
+        assert len(peer.sent) == 5
+
+    asyncio.run(run())
+
+
+def test_only_sport_stops_bypass_the_window():
+    async def run():
+        mux = RequestMultiplexer()
+        mux.set_window(SPORT, 1)
+        mux.set_window(AUDIO, 1)
+        peer = Peer()
+        first = [
+            asyncio.ensure_future(mux.request(SPORT, {"api_id": SPORT_CMD["Move"]}, peer.send)),
+            asyncio.ensure_future(mux.request(AUDIO, {"api_id": AUDIO_API["GET_AUDIO_LIST"]}, peer.send)),
+        ]
+        await settle()
+        stop = asyncio.ensure_future(mux.request(SPORT, {"api_id": SPORT_CMD["StopMove"]}, peer.send))
+        # PAUSE shares its api_id with StopMove but is not a stop
+        pause = asyncio.ensure_future(mux.request(AUDIO, {"api_id": AUDIO_API["PAUSE"]}, peer.send))
+        await settle()
+        sent = [(topic, options["api_id"]) for topic, options in peer.sent]
+        assert (SPORT, SPORT_CMD["StopMove"]) in sent
+        assert (AUDIO, AUDIO_API["PAUSE"]) not in sent
+
+        while not pause.done():
+            peer.respond_all()
+            await settle()
+        await asyncio.gather(stop, *first)
+
+    asyncio.run(run())
+
+
+def test_latency_is_kept_per_topic_and_api_id():
+    async def run():
+        mux = RequestMultiplexer()
+        peer = Peer()
+        tasks = [
+            asyncio.ensure_future(mux.request(SPORT, {"api_id": SPORT_CMD["Damp"]}, peer.send)),
+            asyncio.ensure_future(mux.request(AUDIO, {"api_id": AUDIO_API["GET_AUDIO_LIST"]}, peer.send)),
+        ]
+        await settle()
+        peer.respond_all()
+        await asyncio.gather(*tasks)
+        latency = mux.stats()["latency"]
+        assert latency[f"{SPORT}:{SPORT_CMD['Damp']}"]["count"] == 1
+        assert latency[f"{AUDIO}:{AUDIO_API['GET_AUDIO_LIST']}"]["count"] == 1
+
+    asyncio.run(run())
+
+
+def test_audio_pause_is_not_a_stop_for_the_coalescer():
+    async def run():
+        sent = []
+        coalescer = CommandCoalescer(lambda topic, message, *args: sent.append(message), interval=10)
+        coalescer.enable(SPORT, [SPORT_CMD["Move"]])
+        coalescer.enable(AUDIO)
+        assert not coalescer.coalesces(SPORT, SPORT_CMD["StopMove"])
+        assert coalescer.coalesces(AUDIO, AUDIO_API["PAUSE"])
+
+        coalescer.submit(SPORT, SPORT_CMD["Move"], "move 1", "req", 1)
+        pending = coalescer.submit(SPORT, SPORT_CMD["Move"], "move 2", "req", 2)
+        coalescer.before_send(SPORT, SPORT_CMD["StopMove"])
+        assert sent == ["move 1"] and pending.result() is None
+        coalescer.disable(SPORT)
+        coalescer.disable(AUDIO)
+
+    asyncio.run(run())
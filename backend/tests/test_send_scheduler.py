@@ -0,0 +1,66 @@
+import asyncio
+
+from lib.go2_webrtc_driver.constants import AUDIO_API, DATA_CHANNEL_TYPE, RTC_TOPIC, SPORT_CMD
+from lib.go2_webrtc_driver.msgs.send_scheduler import BULK, CONTROL, TELEMETRY, SendScheduler, classify
+
+SPORT = RTC_TOPIC["SPORT_MOD"]
+AUDIO = RTC_TOPIC["AUDIO_HUB_REQ"]
+
+
+class Channel:
+    readyState = "open"
+
+    def __init__(self):
+        self.sent = []
+        self.bufferedAmount = 0
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def send(self, message):
+        self.sent.append(message)
+        self.bufferedAmount += len(message)
+
+    def flush(self):
+        self.bufferedAmount = 0
+        self.handlers["bufferedamountlow"]()
+
+
+def test_classify():
+    assert classify(SPORT, api_id=SPORT_CMD["StopMove"]) == CONTROL
+    assert classify("", DATA_CHANNEL_TYPE["HEARTBEAT"]) == CONTROL
+    # Audiohub ids overlapping Damp and StopMove are not control
+    assert classify(AUDIO, api_id=AUDIO_API["GET_AUDIO_LIST"]) == TELEMETRY
+    assert classify(AUDIO, api_id=AUDIO_API["PAUSE"]) == TELEMETRY
+    assert classify(AUDIO, api_id=AUDIO_API["UPLOAD_AUDIO_FILE"]) == BULK
+    assert classify("", DATA_CHANNEL_TYPE["RTC_INNER_REQ"], data={"req_type": "push_static_file"}) == BULK
+
+
+def test_control_skips_queued_traffic():
+    channel = Channel()
+    scheduler = SendScheduler(channel, high_water=100, low_threshold=10)
+    scheduler.send("b" * 150, BULK)
+    scheduler.send("bulk", BULK)
+    scheduler.send("telemetry", TELEMETRY)
+    scheduler.send("stop", CONTROL)
+    assert channel.sent == ["b" * 150, "stop"]
+
+    channel.flush()
+    assert channel.sent[2:] == ["telemetry", "bulk"]
+    classes = scheduler.stats()["classes"]
+    assert classes["bulk"]["max_queued"] == 1 and classes["telemetry"]["sent"] == 1
+
+
+def test_writable_waits_for_the_buffer_to_drain():
+    async def run():
+        channel = Channel()
+        scheduler = SendScheduler(channel, high_water=100, low_threshold=10)
+        scheduler.send("b" * 150, BULK)
+        waiter = asyncio.ensure_future(scheduler.writable())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        channel.flush()
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
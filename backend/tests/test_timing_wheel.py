@@ -0,0 +1,110 @@
+import random
+
+from lib.go2_webrtc_driver.msgs.timing_wheel import TimingWheel
+
+
+def step(wheel, start, end, dt=1.0):
+    """expire() at every tick from `start` to `end`; returns {key: time expired}."""
+    fired = {}
+    now = start
+    while now <= end:
+        for key in wheel.expire(now):
+            fired[key] = now
+        now += dt
+    return fired
+
+
+def test_expires_in_deadline_order():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.schedule("c", 5.5)
+    wheel.schedule("a", 1.5)
+    wheel.schedule("b", 3.0)
+    assert wheel.expire(0.0) == []
+    assert wheel.expire(2.0) == ["a"]
+    assert wheel.expire(3.0) == ["b"]
+    assert wheel.expire(5.0) == []
+    assert wheel.expire(6.0) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_earlier_deadline_scheduled_before_first_expire():
+    wheel = TimingWheel(tick=1.0, slots=64)
+    wheel.schedule("long", 130)
+    wheel.schedule("short", 105)
+    assert step(wheel, 100, 140) == {"short": 105, "long": 130}
+
+
+def test_past_deadline_before_first_expire():
+    wheel = TimingWheel(tick=1.0, slots=64)
+    wheel.schedule("late", 10)
+    assert wheel.expire(50) == ["late"]
+
+
+def test_past_deadline_after_expire_fires_next():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.expire(20.0)
+    wheel.schedule("past", 3.0)
+    assert wheel.expire(20.5) == ["past"]
+
+
+def test_cancel():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("b", 2.0)
+    wheel.cancel("a")
+    wheel.cancel("missing")
+    assert "a" not in wheel and "b" in wheel
+    assert wheel.expire(3.0) == ["b"]
+
+
+def test_reschedule_moves_deadline():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("a", 6.0)
+    assert len(wheel) == 1
+    assert step(wheel, 0, 10) == {"a": 6}
+    wheel.schedule("b", 20.0)
+    wheel.schedule("b", 12.0)
+    assert step(wheel, 11, 20) == {"b": 12}
+
+
+def test_deadline_more_than_one_revolution_away():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.expire(0.0)
+    wheel.schedule("far", 27.5)  # Same slot as tick 3, 11 and 19
+    wheel.schedule("near", 3.5)
+    assert step(wheel, 1, 40) == {"near": 4, "far": 28}
+
+
+def test_gap_longer_than_a_revolution():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.expire(0.0)
+    for i in range(20):
+        wheel.schedule(i, i + 0.5)
+    assert sorted(wheel.expire(100.0)) == list(range(20))
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(50):
+        wheel = TimingWheel(tick=0.5, slots=16)
+        deadlines = {}
+        now = rng.uniform(0, 100)
+        for _ in range(200):
+            action = rng.random()
+            if action < 0.5:
+                key = rng.randrange(30)
+                deadline = now + rng.uniform(-5, 30)
+                wheel.schedule(key, deadline)
+                deadlines[key] = deadline
+            elif action < 0.6 and deadlines:
+                key = rng.choice(list(deadlines))
+                wheel.cancel(key)
+                del deadlines[key]
+            else:
+                now += rng.uniform(0, 3)
+                due = {key for key, deadline in deadlines.items() if deadline <= now}
+                assert set(wheel.expire(now)) == due
+                for key in due:
+                    del deadlines[key]
+            assert len(wheel) == len(deadlines)
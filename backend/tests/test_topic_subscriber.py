@@ -0,0 +1,38 @@
+import asyncio
+
+from lib.go2_webrtc_driver.msgs.topic_subscriber import DROP_NEWEST, LATEST_ONLY, TopicSubscriber
+
+
+def test_callback_runs_from_its_own_task():
+    async def run():
+        received = []
+        subscriber = TopicSubscriber("rt/test", received.append)
+        subscriber.put({"n": 1})
+        subscriber.put({"n": 2})
+        assert received == []
+        await asyncio.sleep(0)
+        assert received == [{"n": 1}, {"n": 2}]
+        subscriber.close()
+
+    asyncio.run(run())
+
+
+def test_drop_policies():
+    async def run():
+        newest = TopicSubscriber("rt/test", max_queue=2, policy=DROP_NEWEST)
+        latest = TopicSubscriber("rt/test", policy=LATEST_ONLY)
+        for n in range(4):
+            newest.put(n)
+            latest.put(n)
+        assert [await newest.get(), await newest.get()] == [0, 1]
+        assert await latest.get() == 3
+        assert newest.stats()["dropped"] == 2 and latest.stats()["dropped"] == 3
+
+    asyncio.run(run())
+
+
+def test_max_hz_decimates():
+    subscriber = TopicSubscriber("rt/test", max_queue=100, max_hz=10)
+    accepted = [subscriber.put(n, now=n * 0.01) for n in range(100)]
+    assert sum(accepted) == 10
+    assert subscriber.stats()["decimated"] == 90